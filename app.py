@@ -4,9 +4,16 @@ from dash import Dash, html, dcc
 import dash_mantine_components as dmc
 import dash
 import os
+from background import background_manager
+from payload import init_payload
+from live_data import start_watcher
 
-app = Dash(__name__, use_pages=True, suppress_callback_exceptions=True)
+app = Dash(__name__, use_pages=True, suppress_callback_exceptions=True,
+           background_callback_manager=background_manager)
 server = app.server
+init_payload(server)
+# Picks up new or changed data files while the server runs
+start_watcher()
 
 app.layout = dmc.MantineProvider(
     theme={"colorScheme": "light"},
@@ -26,7 +33,9 @@ app.layout = dmc.MantineProvider(
                         dcc.Link(dmc.Button("Body Comp", variant="light"), href="/bodycomp"),
                         dcc.Link(dmc.Button("Psych Wellbeing", variant="light"), href="/psych"),
                         dcc.Link(dmc.Button("Internet Use", variant="light"), href="/internet"),
-                        dcc.Link(dmc.Button("Actigraphy", variant="light"), href="/actigraphy")
+                        dcc.Link(dmc.Button("Correlations", variant="light"), href="/correlations"),
+                        dcc.Link(dmc.Button("Actigraphy", variant="light"), href="/actigraphy"),
+                        dcc.Link(dmc.Button("Participant", variant="light"), href="/participant")
                         
 
                     ])
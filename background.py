@@ -0,0 +1,85 @@
+# background.py
+
+import hashlib
+import os
+import subprocess
+import sys
+import uuid
+
+from dash import DiskcacheManager
+from data_loader import series_stamps
+from polars_jobs import RESULT_EXPIRE_SECONDS, result_cache
+
+DATA_DIR = "child-mind-institute-problematic-internet-use"
+SERIES_DIR = os.path.join(DATA_DIR, "series_train.parquet")
+POLL_SECONDS = 0.5
+
+
+def scan_source_version() -> str:
+    # Changes whenever a source file or any participant's series file is added or rewritten,
+    # so cached background results are never served for stale data. Stats every series
+    # file: live_data's watcher runs it once per pass and publishes the result
+    stamps = []
+    for name in ("train.csv", "test.csv", "submission.csv"):
+        path = os.path.join(DATA_DIR, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            stamps.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    if os.path.isdir(SERIES_DIR):
+        digest = hashlib.sha1(repr(sorted(series_stamps(SERIES_DIR).items())).encode()).hexdigest()[:16]
+        stamps.append(f"series_train.parquet:{digest}")
+    return "|".join(stamps)
+
+
+# The version of the data the app currently serves; set by the live_data watcher after
+# each reload has been swapped in
+_version = {"value": None}
+
+
+def source_version() -> str:
+    # Called for every cache key, layout render and filter callback, so it only reads
+    # the published value; the files are scanned once, on first use
+    if _version["value"] is None:
+        _version["value"] = scan_source_version()
+    return _version["value"]
+
+
+def publish_source_version(version: str):
+    _version["value"] = version
+
+
+# Heavy callbacks run in a separate process managed by diskcache, so the web worker
+# that received the request is free again immediately. Results are memoised on disk
+# keyed by the callback arguments and source_version().
+background_manager = DiskcacheManager(
+    result_cache,
+    cache_by=[source_version],
+    expire=RESULT_EXPIRE_SECONDS,
+)
+
+
+def run_polars_job(fn, *args, set_progress=None, label: str = ""):
+    # The diskcache manager forks one process per job, but polars' thread pool does not
+    # survive fork() and the child deadlocks on its first parallel query. Polars work is
+    # therefore handed to a fresh interpreter (python -m polars_jobs <job>), which is a
+    # child of the job process and so is killed along with it on cancel.
+    job = uuid.uuid4().hex
+    result_cache.set(f"{job}-request", (fn.__module__, fn.__name__, args, label if set_progress else None),
+                     expire=RESULT_EXPIRE_SECONDS)
+    proc = subprocess.Popen([sys.executable, "-m", "polars_jobs", job])
+
+    while True:
+        # Wakes as soon as the job exits; the timeout only paces the progress updates
+        try:
+            proc.wait(timeout=POLL_SECONDS)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        progress = result_cache.pop(f"{job}-progress", None)
+        if progress is not None and set_progress is not None:
+            set_progress(progress)
+
+    status, payload = result_cache.pop(f"{job}-result", ("error", f"job exited with code {proc.returncode}"))
+    if status == "error":
+        raise RuntimeError(payload)
+    return payload
@@ -0,0 +1,9 @@
+# build_figures.py
+# Precomputes the default figures of every page into figure_bundle/:  python build_figures.py
+
+import figure_bundle
+
+figure_bundle.REBUILD = True
+
+# Importing the app imports every page, and each page builds and saves its own bundle
+import app  # noqa: E402,F401
@@ -0,0 +1,143 @@
+# circadian_features.py
+
+import polars as pl
+
+EPOCH_SECONDS = 300          # 5-minute epochs
+NS_PER_SECOND = 1_000_000_000
+REST_BLOCK_EPOCHS = 6        # 30 minutes of sustained low posture change
+MAX_GAP_EPOCHS = 12          # rest blocks less than an hour apart belong to one sleep window
+# A sleep window only counts when the hour before onset and the hour after wake are at
+# least half covered by worn epochs; otherwise the recording start or end, or non-wear,
+# may have cut it short
+COVERAGE_EPOCHS = 12
+MIN_COVERAGE = 0.5
+HOURS = list(range(24))
+CIRCADIAN_COLUMNS = ["relative_date_PCIAT", "time_of_day", "non-wear_flag", "enmo", "light", "anglez"]
+
+
+def epoch_summary(lf: pl.LazyFrame) -> pl.LazyFrame:
+    # The single pass over the raw 5-second series: every coarser resolution
+    # (hourly, daily, nightly) is derived from these 5-minute epochs
+    seconds = pl.col("relative_date_PCIAT").cast(pl.Int64) * 86400 + pl.col("time_of_day") // NS_PER_SECOND
+    return (
+        lf.filter(pl.col("non-wear_flag") == 0)
+        .with_columns(
+            (seconds // EPOCH_SECONDS).alias("epoch"),
+            pl.col("anglez").diff().abs().alias("anglez_change"),
+        )
+        .group_by("epoch")
+        .agg(
+            pl.mean("enmo"),
+            pl.mean("light"),
+            pl.median("anglez_change"),
+        )
+        .sort("epoch")
+        .with_columns(
+            (pl.col("epoch") * EPOCH_SECONDS // 86400).alias("day"),
+            ((pl.col("epoch") * EPOCH_SECONDS % 86400) // 3600).cast(pl.Int8).alias("hour"),
+            # Noon-to-noon windows, so a night is never split at midnight
+            ((pl.col("epoch") * EPOCH_SECONDS - 43200) // 86400).alias("night"),
+            ((pl.col("epoch") * EPOCH_SECONDS - 43200) % 86400 / 3600).alias("hours_after_noon"),
+        )
+    )
+
+
+def hourly_profile_features(hourly: pl.DataFrame) -> dict:
+    # 24-hour enmo profile, M10 / L5 (most active 10 h, least active 5 h) found with
+    # rolling means over the profile wrapped around midnight
+    profile = (
+        pl.DataFrame({"hour": pl.Series(HOURS, dtype=pl.Int8)})
+        .join(hourly.group_by("hour").agg(pl.mean("enmo")), on="hour", how="left")
+        .sort("hour")
+        .get_column("enmo")
+    )
+    wrapped = pl.concat([profile, profile.head(9)])
+    m10 = wrapped.rolling_mean(10).slice(9, 24)
+    l5 = wrapped.rolling_mean(5).slice(4, 24)
+
+    features = {f"enmo_h{h:02d}": profile[h] for h in HOURS}
+    features["m10"] = m10.max()
+    features["m10_start"] = m10.arg_max()
+    features["l5"] = l5.min()
+    features["l5_start"] = l5.arg_min()
+    if features["m10"] is not None and features["l5"] is not None and features["m10"] + features["l5"] > 0:
+        features["relative_amplitude"] = (features["m10"] - features["l5"]) / (features["m10"] + features["l5"])
+    else:
+        features["relative_amplitude"] = None
+    return features
+
+
+def rhythm_stability_features(hourly: pl.DataFrame) -> dict:
+    # Interdaily stability (how alike the days are) and intradaily variability
+    # (how fragmented the rhythm is) over the per-day hourly enmo means
+    x = hourly.get_column("enmo")
+    n = x.len()
+    variance = ((x - x.mean()) ** 2).sum() if n else 0
+    if n < 2 or not variance:
+        return {"interdaily_stability": None, "intradaily_variability": None}
+
+    hour_means = hourly.group_by("hour").agg(pl.mean("enmo")).get_column("enmo")
+    interdaily = n * ((hour_means - x.mean()) ** 2).sum() / (hour_means.len() * variance)
+    intradaily = n * (x.diff().drop_nulls() ** 2).sum() / ((n - 1) * variance)
+    return {"interdaily_stability": interdaily, "intradaily_variability": intradaily}
+
+
+def sleep_features(epochs: pl.DataFrame) -> dict:
+    # HDCZA-style sleep window: rest epochs are those whose posture barely changes
+    # (below 15x the participant's 10th percentile of 5-minute anglez change), rest
+    # lasting at least 30 minutes forms blocks, blocks less than an hour apart are
+    # merged, and the longest block of each noon-to-noon night is its sleep window.
+    # Windows cut short by the recording edges or by non-wear are left out
+    threshold = epochs.get_column("anglez_change").quantile(0.1)
+    empty = {"sleep_onset_hour": None, "sleep_wake_hour": None, "sleep_hours": None}
+    if threshold is None:
+        return empty
+
+    rest = (
+        epochs.with_columns((pl.col("anglez_change") <= threshold * 15).cast(pl.Int8).alias("rest"))
+        .with_columns(pl.col("rest").rolling_min(REST_BLOCK_EPOCHS).shift(-(REST_BLOCK_EPOCHS - 1)).fill_null(0).alias("block_start"))
+        .with_columns(pl.col("block_start").rolling_max(REST_BLOCK_EPOCHS, min_samples=1).alias("in_block"))
+        .filter(pl.col("in_block") == 1)
+        .with_columns(((pl.col("epoch").diff() > MAX_GAP_EPOCHS) | (pl.col("night").diff() != 0)).fill_null(True).cum_sum().alias("block"))
+    )
+    windows = (
+        rest.group_by(["night", "block"]).agg(
+            pl.min("hours_after_noon").alias("onset"),
+            (pl.max("hours_after_noon") + EPOCH_SECONDS / 3600).alias("wake"),
+        )
+        .with_columns((pl.col("wake") - pl.col("onset")).alias("sleep_hours"))
+        .sort("sleep_hours", descending=True)
+        .unique("night", keep="first")
+    )
+    margin = COVERAGE_EPOCHS * EPOCH_SECONDS / 3600
+    coverage = (
+        windows.join(epochs.select("night", "hours_after_noon"), on="night")
+        .group_by("night").agg(
+            pl.col("hours_after_noon").is_between(pl.col("onset") - margin, pl.col("onset"), closed="left").sum().alias("before"),
+            pl.col("hours_after_noon").is_between(pl.col("wake"), pl.col("wake") + margin, closed="left").sum().alias("after"),
+        )
+    )
+    windows = windows.join(coverage, on="night").filter(
+        (pl.col("before") >= COVERAGE_EPOCHS * MIN_COVERAGE) & (pl.col("after") >= COVERAGE_EPOCHS * MIN_COVERAGE)
+    )
+    if windows.is_empty():
+        return empty
+
+    return {
+        "sleep_onset_hour": (windows.get_column("onset").mean() + 12) % 24,
+        "sleep_wake_hour": (windows.get_column("wake").mean() + 12) % 24,
+        "sleep_hours": windows.get_column("sleep_hours").mean(),
+    }
+
+
+def compute_circadian_features(lf: pl.LazyFrame, id_val: str) -> pl.DataFrame:
+    epochs = epoch_summary(lf.select(CIRCADIAN_COLUMNS)).collect()
+    hourly = epochs.group_by(["day", "hour"]).agg(pl.mean("enmo")).sort(["day", "hour"])
+
+    features = {"id": id_val, "n_days": epochs.get_column("day").n_unique()}
+    features.update(hourly_profile_features(hourly))
+    features.update(rhythm_stability_features(hourly))
+    features.update(sleep_features(epochs))
+    features["mean_light_night"] = epochs.filter((pl.col("hour") >= 22) | (pl.col("hour") < 7)).get_column("light").mean()
+    return pl.DataFrame([features], schema_overrides={"m10_start": pl.Int8, "l5_start": pl.Int8})
+
@@ -0,0 +1,77 @@
+# compact_series.py
+# Rewrites the hive-partitioned actigraphy series (thousands of id=*/part-0.parquet files)
+# into a few large parquet files sorted by id and time:
+#   python compact_series.py [series_dir] [--out DIR] [--rows-per-file N] [--row-group-size N]
+# Without --out the series directory is replaced in place and the original partitions
+# are kept next to it as <series_dir>.hive
+
+import argparse
+import os
+import shutil
+
+import polars as pl
+from data_loader import list_participant_ids, participant_file, series_layout
+
+SERIES_DIR = "child-mind-institute-problematic-internet-use/series_train.parquet"
+SORT_COLUMNS = ["id", "relative_date_PCIAT", "time_of_day"]
+ROWS_PER_FILE = 25_000_000
+# Small enough that most row groups hold one or two participants, so the id
+# statistics let single-participant reads skip everything else
+ROW_GROUP_SIZE = 250_000
+
+
+def plan_files(directory: str, rows_per_file: int) -> list[list[str]]:
+    # Consecutive runs of sorted ids, each holding about rows_per_file rows
+    # (row counts come from the parquet footers, no data is read)
+    batches, batch, batch_rows = [], [], 0
+    for id_val in list_participant_ids(directory):
+        file_path = participant_file(directory, id_val)
+        if not os.path.exists(file_path):
+            continue
+        batch.append(id_val)
+        batch_rows += pl.scan_parquet(file_path).select(pl.len()).collect().item()
+        if batch_rows >= rows_per_file:
+            batches.append(batch)
+            batch, batch_rows = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def compact_series(directory: str, out: str | None = None, rows_per_file: int = ROWS_PER_FILE,
+                   row_group_size: int = ROW_GROUP_SIZE) -> str:
+    if series_layout(directory) != "hive":
+        raise ValueError(f"{directory} is already compacted")
+    if out is not None and os.path.exists(out):
+        raise FileExistsError(f"{out} already exists")
+
+    target = out or directory
+    staging = f"{target}.compacting"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    for i, ids in enumerate(plan_files(directory, rows_per_file)):
+        path = os.path.join(staging, f"part-{i:04d}.parquet")
+        (
+            pl.concat([pl.scan_parquet(participant_file(directory, id_val)).with_columns(pl.lit(id_val).alias("id"))
+                       for id_val in ids], how="vertical_relaxed")
+            .sort(SORT_COLUMNS)
+            .sink_parquet(path, compression="zstd", statistics=True, row_group_size=row_group_size)
+        )
+        print(f"[COMPACT] {path}: {len(ids)} participants, {os.path.getsize(path) / 1024 ** 2:.1f} MB")
+
+    if out is None:
+        os.replace(directory, f"{directory}.hive")
+    os.replace(staging, target)
+    print(f"[COMPACT] {target} is now {len(os.listdir(target))} files")
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact the hive-partitioned actigraphy series.")
+    parser.add_argument("directory", nargs="?", default=SERIES_DIR)
+    parser.add_argument("--out", default=None, help="write here instead of replacing the series directory")
+    parser.add_argument("--rows-per-file", type=int, default=ROWS_PER_FILE)
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    args = parser.parse_args()
+    compact_series(args.directory, args.out, args.rows_per_file, args.row_group_size)
@@ -0,0 +1,152 @@
+# correlation.py
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from scipy.stats import rankdata
+
+from background import source_version
+from data_loader import train_filters
+from live_data import scan_dataset
+
+BLOCK_SIZE = 128      # columns per block; bounds the n x block temporaries
+MIN_PERIODS = 10      # fewer complete pairs than this gives NaN
+TARGETS = ["PCIAT-PCIAT_Total", "sii"]
+# PCIAT questionnaire items make up the target, so they would trivially correlate with it
+EXCLUDED_PREFIXES = ("PCIAT-",)
+
+
+def _standardized_ranks(values: np.ndarray) -> np.ndarray:
+    # Average ranks per column of complete rows, scaled to mean 0 and unit variance;
+    # constant columns become NaN
+    ranks = rankdata(values, method="average", axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (ranks - ranks.mean(axis=0)) / ranks.std(axis=0)
+
+
+def _center(values: np.ndarray) -> np.ndarray:
+    # Centering by the column mean leaves r unchanged and keeps the sums well conditioned
+    counts = np.maximum((~np.isnan(values)).sum(axis=0), 1)
+    return values - np.nansum(values, axis=0) / counts
+
+
+def _null_patterns(values: np.ndarray) -> list[tuple[np.ndarray, np.ndarray]]:
+    # (non-null row mask, column indices) for every distinct null pattern among the columns
+    present = ~np.isnan(values)
+    patterns, inverse = np.unique(present.T, axis=0, return_inverse=True)
+    return [(pattern, np.flatnonzero(inverse.ravel() == i)) for i, pattern in enumerate(patterns)]
+
+
+def _spearman_corr(left: np.ndarray, right: np.ndarray | None,
+                   min_periods: int) -> tuple[np.ndarray, np.ndarray]:
+    # Pairwise-complete Spearman as in pandas: both columns of a pair are ranked over
+    # the rows where both are present. Columns with the same null pattern share those
+    # rows for any partner, so ranking is done once per pair of null patterns, over all
+    # the columns of both, and r is the product of the standardized ranks
+    same = right is None
+    right = left if same else right
+    patterns_l, patterns_r = _null_patterns(left), _null_patterns(right)
+    corr = np.full((left.shape[1], right.shape[1]), np.nan)
+    counts = np.zeros((left.shape[1], right.shape[1]), dtype=np.int64)
+    for i, (rows_l, cols_l) in enumerate(patterns_l):
+        # Against itself the result is symmetric: each pair of patterns is done once and
+        # written to both blocks
+        for rows_r, cols_r in patterns_r[i:] if same else patterns_r:
+            rows = rows_l & rows_r
+            n = int(rows.sum())
+            r = np.full((cols_l.size, cols_r.size), np.nan)
+            if n >= min_periods:
+                r = _standardized_ranks(left[np.ix_(rows, cols_l)]).T @ _standardized_ranks(right[np.ix_(rows, cols_r)]) / n
+            corr[np.ix_(cols_l, cols_r)], counts[np.ix_(cols_l, cols_r)] = np.clip(r, -1.0, 1.0), n
+            if same:
+                corr[np.ix_(cols_r, cols_l)], counts[np.ix_(cols_r, cols_l)] = corr[np.ix_(cols_l, cols_r)].T, n
+    return corr, counts
+
+
+def pairwise_corr(left: np.ndarray, right: np.ndarray | None = None, method: str = "pearson",
+                  min_periods: int = MIN_PERIODS) -> tuple[np.ndarray, np.ndarray]:
+    # Pairwise-complete correlation of every column of left with every column of right
+    # (left itself when right is None) plus the number of complete pairs behind each
+    # value. Pearson uses masked matrix products over column blocks, so nulls are
+    # handled without a per-pair loop; Spearman re-ranks per pair of null patterns.
+    if method == "spearman":
+        return _spearman_corr(left, right, min_periods)
+    if method != "pearson":
+        raise ValueError(f"Unknown correlation method: {method}")
+
+    left = _center(left)
+    right = left if right is None else _center(right)
+    mask_r = ~np.isnan(right)
+    x_r = np.where(mask_r, right, 0.0)
+    mask_r = mask_r.astype(np.float64)
+
+    corr = np.full((left.shape[1], right.shape[1]), np.nan)
+    counts = np.zeros((left.shape[1], right.shape[1]), dtype=np.int64)
+    for start in range(0, left.shape[1], BLOCK_SIZE):
+        block = left[:, start:start + BLOCK_SIZE]
+        mask_l = ~np.isnan(block)
+        x_l = np.where(mask_l, block, 0.0)
+        mask_l = mask_l.astype(np.float64)
+
+        n = mask_l.T @ mask_r
+        sum_l, sum_r = x_l.T @ mask_r, mask_l.T @ x_r
+        sum_ll, sum_rr = (x_l ** 2).T @ mask_r, mask_l.T @ (x_r ** 2)
+        sum_lr = x_l.T @ x_r
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = sum_lr - sum_l * sum_r / n
+            var_l = sum_ll - sum_l ** 2 / n
+            var_r = sum_rr - sum_r ** 2 / n
+            r = cov / np.sqrt(var_l * var_r)
+        r[(n < min_periods) | (var_l <= 0) | (var_r <= 0)] = np.nan
+
+        corr[start:start + BLOCK_SIZE] = np.clip(r, -1.0, 1.0)
+        counts[start:start + BLOCK_SIZE] = n.astype(np.int64)
+    return corr, counts
+
+
+def feature_columns(df: pl.DataFrame) -> list[str]:
+    return [col for col, dtype in df.schema.items()
+            if dtype.is_numeric() and not col.startswith(EXCLUDED_PREFIXES)
+            and col not in TARGETS and col not in ("age", "sex")]
+
+
+def target_matrix(df: pl.DataFrame) -> np.ndarray:
+    # prepare_train_data maps a missing PCIAT total to SII 3; those participants have
+    # no SII, so they must not join the sii correlations as the most severe class
+    return df.select(
+        pl.col("PCIAT-PCIAT_Total").cast(pl.Float64),
+        pl.when(pl.col("PCIAT-PCIAT_Total").is_not_null()).then(pl.col("sii")).cast(pl.Float64).alias("sii"),
+    ).to_numpy()
+
+
+@lru_cache(maxsize=64)
+def _correlations(version: str, age_min: int, age_max: int, gender: str, method: str):
+    df = scan_dataset("train", filters=train_filters((age_min, age_max), gender)).collect()
+    features = feature_columns(df)
+    values = df.select(pl.col(features).cast(pl.Float64)).to_numpy()
+    targets = target_matrix(df)
+
+    matrix, matrix_n = pairwise_corr(values, method=method)
+    target_r, target_n = pairwise_corr(values, targets, method=method)
+    return {
+        "features": features,
+        "rows": len(df),
+        "matrix": pd.DataFrame(matrix, index=features, columns=features),
+        "matrix_n": pd.DataFrame(matrix_n, index=features, columns=features),
+        "target": pd.DataFrame(target_r, index=features, columns=TARGETS),
+        "target_n": pd.DataFrame(target_n, index=features, columns=TARGETS),
+    }
+
+
+def correlations(age_range, gender: str = "all", method: str = "pearson") -> dict:
+    # Cached per data version and filter state; a live reload changes the version, so
+    # results for the old data are never served
+    return _correlations(source_version(), int(age_range[0]), int(age_range[1]), gender, method)
+
+
+def top_features(result: dict, target: str, n: int = 20) -> pd.DataFrame:
+    ranked = pd.DataFrame({"r": result["target"][target], "n": result["target_n"][target]}).dropna()
+    return ranked.reindex(ranked["r"].abs().sort_values(ascending=False).index).head(n)
@@ -1,12 +1,42 @@
 # data_loader.py
 
 import polars as pl
+import polars.selectors as cs
+import pyarrow.parquet as pq
 import os
+from typing import Callable, Iterator
+from downsampling import lttb
 
+ProgressCallback = Callable[[int, int], None]
 
-def load_train_data(path: str) -> pl.DataFrame:
-    df = pl.read_csv(path)
+SEASON_DTYPE = pl.Enum(["Spring", "Summer", "Fall", "Winter"])
+SERIES_COLUMNS = ["X", "Y", "Z", "enmo", "anglez", "light", "non-wear_flag"]
+# Rows per batch when streaming a compacted series file
+SERIES_BATCH_ROWS = 250_000
+# Basic_Demos-Sex coding behind the "M" / "F" gender filter
+GENDER_CODES = {"M": 1, "F": 0}
+
+
+def frame_memory_mb(df: pl.DataFrame) -> float:
+    return df.estimated_size("mb")
+
+
+def compact_frame(df: pl.DataFrame, label: str = "frame") -> pl.DataFrame:
+    # Downcast measurements to Float32, shrink integer codes (sii, sex, counts, days)
+    # to the smallest width that fits, and store ids / season labels as categoricals
+    before = frame_memory_mb(df)
     df = df.with_columns([
+        cs.float().cast(pl.Float32),
+        cs.integer().shrink_dtype(),
+        cs.matches("Season$").cast(SEASON_DTYPE),
+        cs.by_name("id", require_all=False).cast(pl.Categorical),
+    ])
+    print(f"[MEMORY] {label}: {before:.2f} MB -> {frame_memory_mb(df):.2f} MB")
+    return df
+
+
+def prepare_train_data(df: pl.DataFrame) -> pl.DataFrame:
+    return df.with_columns([
         pl.col("Basic_Demos-Age").alias("age"),
         pl.col("Basic_Demos-Sex").alias("sex"),
         pl.when(pl.col("PCIAT-PCIAT_Total") <= 30).then(0)
@@ -14,21 +44,168 @@ def load_train_data(path: str) -> pl.DataFrame:
          .when(pl.col("PCIAT-PCIAT_Total") <= 79).then(2)
          .otherwise(3).alias("sii")
     ])
-    return df
 
 
-def load_actigraphy_series(directory: str) -> pl.DataFrame:
-    id_folders = [f.name for f in os.scandir(directory) if f.is_dir() and f.name.startswith("id=")]
-    all_series = []
+def train_filters(age_range=None, gender: str = "all") -> list[pl.Expr]:
+    # Predicates for the dashboards' shared age / gender filters
+    filters = []
+    if age_range is not None:
+        filters.append(pl.col("age").is_between(age_range[0], age_range[1]))
+    if gender in GENDER_CODES:
+        filters.append(pl.col("sex") == GENDER_CODES[gender])
+    return filters
+
+
+def query_frame(lf: pl.LazyFrame, columns: list[str] | None = None,
+                filters: list[pl.Expr] | None = None) -> pl.LazyFrame:
+    # Filters are applied before the projection, so they may use columns the caller
+    # does not keep. Over an in-memory frame this only saves copying: the selected
+    # columns of the matching rows are all that is materialized
+    if filters:
+        lf = lf.filter(*filters)
+    return lf if columns is None else lf.select(columns)
+
+
+def load_train_data(path: str, compact: bool = False) -> pl.DataFrame:
+    df = prepare_train_data(pl.read_csv(path))
+    return compact_frame(df, "train") if compact else df
+
+
+def series_layout(directory: str) -> str:
+    # "compact" for the large sorted files written by compact_series.py,
+    # "hive" for the original id=*/part-0.parquet partitions
+    return "compact" if series_files(directory) else "hive"
+
+
+def series_files(directory: str) -> list[str]:
+    return sorted(os.path.join(directory, f.name) for f in os.scandir(directory)
+                  if f.is_file() and f.name.endswith(".parquet"))
+
+
+# compacted file path -> ((size, mtime_ns), {id: rows}); a file's ids are only re-read
+# when the file changes
+_compact_ids = {}
+
+
+def _compact_file_ids(path: str) -> dict[str, int]:
+    stat = os.stat(path)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    cached = _compact_ids.get(path)
+    if cached is None or cached[0] != stamp:
+        counts = pl.scan_parquet(path).group_by("id").len().collect()
+        cached = _compact_ids[path] = (stamp, dict(zip(counts.get_column("id").to_list(), counts.get_column("len").to_list())))
+    return cached[1]
+
+
+def series_stamps(directory: str) -> dict[str, tuple[int, int]]:
+    # Per participant: (size, mtime_ns) of its file, or in the compact layout its row
+    # count and the mtime_ns of the file holding it, so a rewritten file only marks the
+    # participants in it as changed
+    if series_layout(directory) == "compact":
+        stamps = {}
+        for path in series_files(directory):
+            mtime = os.stat(path).st_mtime_ns
+            stamps.update({id_val: (rows, mtime) for id_val, rows in _compact_file_ids(path).items()})
+        return stamps
+
+    stamps = {}
+    for f in os.scandir(directory):
+        if f.is_dir() and f.name.startswith("id="):
+            try:
+                stat = os.stat(os.path.join(f.path, "part-0.parquet"))
+            except FileNotFoundError:
+                continue
+            stamps[f.name.split("=")[-1]] = (stat.st_size, stat.st_mtime_ns)
+    return stamps
+
+
+def participant_file(directory: str, participant_id: str) -> str:
+    return os.path.join(directory, f"id={participant_id}", "part-0.parquet")
+
+
+def scan_participant(directory: str, participant_id: str) -> pl.LazyFrame | None:
+    # One participant's series without the id column. In the compact layout the id
+    # filter is checked against row-group statistics, so only that participant's
+    # row groups are read.
+    if series_layout(directory) == "compact":
+        return pl.scan_parquet(series_files(directory)).filter(pl.col("id") == participant_id).drop("id")
+
+    file_path = participant_file(directory, participant_id)
+    return pl.scan_parquet(file_path) if os.path.exists(file_path) else None
 
-    for id_folder in id_folders:
+
+def iter_participant_series(directory: str, columns: list[str] | None = None) -> Iterator[tuple[str, pl.LazyFrame]]:
+    # (id, series) for every participant, series without the id column. Compact files
+    # are streamed front to back in batches and split by id; the rows of the last id in
+    # a batch are held until the next batch shows whether that participant continues,
+    # so memory stays at one batch plus one participant.
+    if series_layout(directory) == "compact":
+        pieces = []
+        for path in series_files(directory):
+            batches = pq.ParquetFile(path).iter_batches(batch_size=SERIES_BATCH_ROWS,
+                                                        columns=None if columns is None else ["id"] + columns)
+            for batch in batches:
+                for part in pl.from_arrow(batch).partition_by("id", maintain_order=True):
+                    if pieces and pieces[0].get_column("id")[0] != part.get_column("id")[0]:
+                        yield pieces[0].get_column("id")[0], pl.concat(pieces).drop("id").lazy()
+                        pieces = []
+                    pieces.append(part)
+        if pieces:
+            yield pieces[0].get_column("id")[0], pl.concat(pieces).drop("id").lazy()
+        return
+
+    for id_folder in (f.name for f in os.scandir(directory) if f.is_dir() and f.name.startswith("id=")):
         id_val = id_folder.split("=")[-1]
-        file_path = os.path.join(directory, id_folder, "part-0.parquet")
+        file_path = participant_file(directory, id_val)
         if os.path.exists(file_path):
-            df = pl.read_parquet(file_path).with_columns(pl.lit(id_val).alias("id"))
-            all_series.append(df)
+            lf = pl.scan_parquet(file_path)
+            yield id_val, lf if columns is None else lf.select(columns)
+
+
+def load_actigraphy_series(directory: str, compact: bool = False) -> pl.DataFrame:
+    if series_layout(directory) == "compact":
+        series = pl.read_parquet(series_files(directory))
+    else:
+        all_series = [lf.collect().with_columns(pl.lit(id_val).alias("id"))
+                      for id_val, lf in iter_participant_series(directory)]
+        if not all_series:
+            return pl.DataFrame()
+        series = pl.concat(all_series)
+    return compact_frame(series, "actigraphy series") if compact else series
+
+
+def list_participant_ids(directory: str) -> list[str]:
+    if series_layout(directory) == "compact":
+        ids = pl.scan_parquet(series_files(directory)).select(pl.col("id").unique()).collect()
+        return sorted(ids.get_column("id").to_list())
+    return sorted(f.name.split("=")[-1] for f in os.scandir(directory) if f.is_dir() and f.name.startswith("id="))
+
+
+def load_participant_series(directory: str, participant_id: str, columns: list[str] | None = None,
+                            day_range: tuple[int, int] | None = None) -> pl.DataFrame:
+    # Reads a single participant, projecting only the requested columns and
+    # pushing the relative_date_PCIAT range down into the parquet scan
+    lf = scan_participant(directory, participant_id)
+    if lf is None:
+        return pl.DataFrame()
+
+    lf = lf.select(["relative_date_PCIAT", "time_of_day"] + (columns or SERIES_COLUMNS))
+    if day_range is not None:
+        lf = lf.filter(pl.col("relative_date_PCIAT").is_between(*day_range))
+
+    return lf.with_columns(
+        (pl.col("relative_date_PCIAT") + pl.col("time_of_day") / 86400e9).alias("day")
+    ).collect()
+
 
-    return pl.concat(all_series) if all_series else pl.DataFrame()
+def load_participant_traces(directory: str, participant_id: str, columns: list[str] | None = None,
+                            day_range: tuple[int, int] | None = None, n_out: int = 2000) -> dict:
+    # {column: (day, value)} downsampled with LTTB to at most n_out points per trace
+    series = load_participant_series(directory, participant_id, columns, day_range)
+    if series.is_empty():
+        return {}
+    day = series.get_column("day").to_numpy()
+    return {col: lttb(day, series.get_column(col).to_numpy(), n_out) for col in (columns or SERIES_COLUMNS)}
 
 
 
@@ -64,27 +241,29 @@ def preprocess_actigraphy_daily_features(df: pl.DataFrame) -> pl.DataFrame:
 
 
 
-def batch_process_actigraphy_features(directory: str) -> pl.DataFrame:
-    id_folders = [f.name for f in os.scandir(directory) if f.is_dir() and f.name.startswith("id=")]
-    all_features = []
+def participant_daily_features(lf: pl.LazyFrame, id_val: str) -> pl.DataFrame:
+    return preprocess_actigraphy_daily_features(lf.collect().with_columns(pl.lit(id_val).alias("id")))
 
-    for id_folder in id_folders:
-        id_val = id_folder.split("=")[-1]
-        file_path = os.path.join(directory, id_folder, "part-0.parquet")
 
-        if os.path.exists(file_path):
-            try:
-                raw_df = pl.read_parquet(file_path)
-                if not isinstance(raw_df, pl.DataFrame):
-                    raw_df = pl.DataFrame(raw_df)
-                df = raw_df.with_columns(pl.lit(id_val).alias("id"))
-                features = preprocess_actigraphy_daily_features(df)
-                all_features.append(features)
-            except Exception as e:
-                print(f"❌ Failed to process {id_val}: {type(raw_df).__name__} — {e}")
-
-    if all_features:
-        return pl.concat(all_features, how="vertical")
-    else:
-        return pl.DataFrame()
+def participant_hourly_profile(lf: pl.LazyFrame, id_val: str) -> pl.DataFrame:
+    return (
+        lf.filter(pl.col("non-wear_flag") == 0)
+        .group_by((pl.col("time_of_day") // 3_600_000_000_000).cast(pl.Int8).alias("hour"))
+        .agg(pl.mean("enmo"), pl.mean("light"), pl.mean("anglez"))
+        .with_columns(pl.lit(id_val).alias("id"))
+        .collect()
+    )
+
+
+def hourly_activity_profile(directory: str, progress: ProgressCallback | None = None) -> pl.DataFrame:
+    # Mean worn-time enmo / light / anglez per participant and hour of day
+    total = len(list_participant_ids(directory)) if progress is not None else 0
+    all_profiles = []
+
+    for done, (id_val, lf) in enumerate(iter_participant_series(directory, ["time_of_day", "non-wear_flag", "enmo", "light", "anglez"]), start=1):
+        all_profiles.append(participant_hourly_profile(lf, id_val))
+
+        if progress is not None:
+            progress(done, total)
 
+    return pl.concat(all_profiles) if all_profiles else pl.DataFrame()
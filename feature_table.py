@@ -0,0 +1,160 @@
+# feature_table.py
+# Participant-level feature table: one row per participant with the tabular fields,
+# actigraphy daily aggregates, circadian features and series summary statistics,
+# materialized as parquet for the dashboard and the training / scoring code:
+#   python feature_table.py [train] [test]
+
+import hashlib
+import json
+import os
+import sys
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from circadian_features import compute_circadian_features
+from data_loader import (ProgressCallback, SEASON_DTYPE, iter_participant_series, list_participant_ids,
+                         participant_daily_features, prepare_train_data, series_stamps)
+
+DATA_DIR = "child-mind-institute-problematic-internet-use"
+FEATURE_TABLE_DIR = os.environ.get("PIU_FEATURE_TABLE", "feature_table")
+# Bump when a feature definition changes, so tables built by older code are rebuilt
+SCHEMA_VERSION = 2
+SPLITS = {
+    "train": ("train.csv", "series_train.parquet"),
+    "test": ("test.csv", "series_test.parquet"),
+}
+SUMMARY_COLUMNS = ["X", "Y", "Z", "enmo", "anglez", "light", "battery_voltage", "non-wear_flag"]
+DAILY_COLUMNS = ["mean_enmo", "total_enmo", "mean_light", "max_light", "mean_anglez", "percent_night_activity"]
+
+
+def table_path(split: str) -> str:
+    return os.path.join(FEATURE_TABLE_DIR, f"{split}.parquet")
+
+
+def _split_stamps(split: str) -> tuple[str, dict]:
+    csv_name, series_name = SPLITS[split]
+    stat = os.stat(os.path.join(DATA_DIR, csv_name))
+    series_dir = os.path.join(DATA_DIR, series_name)
+    stamps = series_stamps(series_dir) if os.path.isdir(series_dir) else {}
+    return f"{SCHEMA_VERSION}|{csv_name}:{stat.st_size}:{stat.st_mtime_ns}", stamps
+
+
+def table_version(split: str) -> str:
+    head, stamps = _split_stamps(split)
+    return hashlib.sha1(f"{head}|{sorted(stamps.items())}".encode()).hexdigest()[:16]
+
+
+def series_summary(df: pl.DataFrame) -> dict:
+    # Per-column distribution of the raw series (the notebook's describe() stats, named)
+    features = {}
+    for col in SUMMARY_COLUMNS:
+        values = df.get_column(col)
+        features.update({
+            f"{col}_mean": values.mean(), f"{col}_std": values.std(),
+            f"{col}_min": values.min(), f"{col}_q25": values.quantile(0.25),
+            f"{col}_median": values.median(), f"{col}_q75": values.quantile(0.75),
+            f"{col}_max": values.max(),
+        })
+    features["n_samples"] = df.height
+    return features
+
+
+def daily_summary(df: pl.DataFrame, id_val: str) -> dict:
+    daily = participant_daily_features(df.lazy(), id_val)
+    features = {f"daily_{col}": daily.get_column(col).mean() for col in DAILY_COLUMNS}
+    features["daily_n_days"] = daily.height
+    return features
+
+
+def participant_features(lf: pl.LazyFrame, id_val: str) -> pl.DataFrame:
+    # The series is read once; every feature family works off the same frame
+    df = lf.collect()
+    features = {"id": id_val}
+    features.update(series_summary(df))
+    features.update(daily_summary(df, id_val))
+    circadian = compute_circadian_features(df.lazy(), id_val).drop("id")
+    return pl.concat([pl.DataFrame([features]), circadian], how="horizontal")
+
+
+def _previous_series_rows(split: str, stamps: dict) -> pl.DataFrame | None:
+    # Series feature rows of the last table for participants whose file is unchanged
+    path = table_path(split)
+    if not os.path.exists(path):
+        return None
+    metadata = pq.read_schema(path).metadata or {}
+    if int(metadata.get(b"piu_schema_version", b"0")) != SCHEMA_VERSION:
+        return None
+
+    old_stamps = json.loads(metadata.get(b"piu_series_stamps", b"{}"))
+    unchanged = [pid for pid, stamp in stamps.items() if old_stamps.get(pid) == list(stamp)]
+    series_cols = json.loads(metadata.get(b"piu_series_columns", b"[]"))
+    if not unchanged or not series_cols:
+        return None
+    return pl.read_parquet(path, columns=series_cols).filter(pl.col("id").is_in(unchanged)).unique("id")
+
+
+def build_feature_table(split: str = "train", progress: ProgressCallback | None = None) -> pl.DataFrame:
+    csv_name, series_name = SPLITS[split]
+    series_dir = os.path.join(DATA_DIR, series_name)
+    version = table_version(split)
+    _, stamps = _split_stamps(split)
+
+    tabular = pl.read_csv(os.path.join(DATA_DIR, csv_name)).with_columns(pl.col("^.*Season$").cast(SEASON_DTYPE))
+    if split == "train":
+        tabular = prepare_train_data(tabular)
+    # A row appended for an existing id updates that participant, as in live_data
+    tabular = tabular.unique("id", keep="last", maintain_order=True)
+
+    reused = _previous_series_rows(split, stamps)
+    done_ids = set() if reused is None else set(reused.get_column("id").to_list())
+    rows = [] if reused is None else [reused]
+    if done_ids:
+        print(f"[FEATURES] {split}: reusing {len(done_ids)} unchanged participants")
+
+    if os.path.isdir(series_dir):
+        total = len(list_participant_ids(series_dir)) if progress is not None else 0
+        for done, (id_val, lf) in enumerate(iter_participant_series(series_dir), start=1):
+            if id_val not in done_ids:
+                try:
+                    rows.append(participant_features(lf, id_val))
+                except Exception as e:
+                    print(f"❌ Failed to process {id_val}: {e}")
+            if progress is not None:
+                progress(done, total)
+
+    series = pl.concat(rows, how="diagonal_relaxed") if rows else pl.DataFrame({"id": []}, schema={"id": pl.String})
+    table = tabular.join(series, on="id", how="left")
+
+    os.makedirs(FEATURE_TABLE_DIR, exist_ok=True)
+    arrow = table.to_arrow()
+    arrow = arrow.replace_schema_metadata({
+        **(arrow.schema.metadata or {}),
+        b"piu_feature_version": version.encode(),
+        b"piu_schema_version": str(SCHEMA_VERSION).encode(),
+        b"piu_series_stamps": json.dumps(stamps).encode(),
+        b"piu_series_columns": json.dumps(series.columns).encode(),
+    })
+    path = table_path(split)
+    pq.write_table(arrow, f"{path}.tmp")
+    os.replace(f"{path}.tmp", path)
+    print(f"[FEATURES] {split}: wrote {path} ({table.height} x {table.width}, {os.path.getsize(path) / 1024:.1f} KB)")
+    return table
+
+
+def load_feature_table(split: str = "train", build: bool = False,
+                       progress: ProgressCallback | None = None) -> pl.DataFrame | None:
+    # The materialized table when it matches the current data; with build=True a stale
+    # or missing table is (re)built, otherwise None is returned
+    path = table_path(split)
+    if os.path.exists(path):
+        metadata = pq.read_schema(path).metadata or {}
+        if metadata.get(b"piu_feature_version", b"").decode() == table_version(split):
+            return pl.read_parquet(path)
+        print(f"[FEATURES] {split}: {path} was built for other data")
+    return build_feature_table(split, progress) if build else None
+
+
+if __name__ == "__main__":
+    for split in sys.argv[1:] or ["train"]:
+        build_feature_table(split)
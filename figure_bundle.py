@@ -0,0 +1,97 @@
+# figure_bundle.py
+
+import json
+import os
+import plotly.io as pio
+from background import source_version
+from payload import compact_figure
+
+BUNDLE_DIR = os.environ.get("PIU_FIGURE_BUNDLE", "figure_bundle")
+# Bump when the figure builders or compact_figure change, so bundles written by older
+# code are rebuilt rather than served until the data changes
+BUNDLE_VERSION = 2
+
+# Set by build_figures.py: build every page's defaults from raw data and write them out
+REBUILD = False
+
+# page -> (data version, bundle) last handed out by live_bundle
+_live = {}
+
+
+def bundle_path(page: str) -> str:
+    return os.path.join(BUNDLE_DIR, f"{page}.json")
+
+
+def load_bundle(page: str, version: str) -> dict | None:
+    path = bundle_path(page)
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        bundle = json.load(f)
+    if bundle.get("bundle_version") != BUNDLE_VERSION:
+        print(f"[BUNDLE] {page}: {path} was built by older figure code, recomputing")
+        return None
+    if bundle.get("data_version") != version:
+        print(f"[BUNDLE] {page}: {path} was built for other data, recomputing")
+        return None
+    return bundle
+
+
+def save_bundle(page: str, bundle: dict, version: str):
+    os.makedirs(BUNDLE_DIR, exist_ok=True)
+    payload = {
+        "bundle_version": BUNDLE_VERSION,
+        "data_version": version,
+        "layout": bundle["layout"],
+        "figures": {name: json.loads(pio.to_json(fig, validate=False)) for name, fig in bundle["figures"].items()},
+    }
+
+    path = bundle_path(page)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(payload, f)
+    os.replace(f"{path}.tmp", path)
+    print(f"[BUNDLE] {page}: wrote {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+
+def page_bundle(page: str, build) -> dict:
+    # Default (unfiltered) figures and layout values for a page. They are the same for
+    # every visitor, so they are read from the prebuilt bundle when it matches the
+    # current data; build() only runs when there is no usable bundle. Raw data is only
+    # needed once a filter changes.
+    version = source_version()
+    bundle = None if REBUILD else load_bundle(page, version)
+    if bundle is None:
+        bundle = build()
+        bundle["figures"] = {name: compact_figure(fig) for name, fig in bundle["figures"].items()}
+        if REBUILD:
+            save_bundle(page, bundle, version)
+    return bundle
+
+
+def live_bundle(page: str, build) -> dict:
+    # page_bundle for the current data version, for layouts rendered per visit: after a
+    # live reload the bundle is rebuilt once, then reused until the data changes again
+    version = source_version()
+    cached = _live.get(page)
+    if cached is None or cached[0] != version:
+        cached = _live[page] = (version, page_bundle(page, build))
+    return cached[1]
+
+
+def bundle_view(page: str, build, figure_names: list[str]):
+    # The default figures and layout values of a page whose layout is rendered per visit.
+    # The bundle is loaded here, at page import, so the first visit is served from memory,
+    # and looked up again on every render, so the defaults follow live reloads
+    live_bundle(page, build)
+
+    def view() -> tuple[list, dict]:
+        bundle = live_bundle(page, build)
+        return [bundle["figures"][name] for name in figure_names], bundle["layout"]
+
+    return view
+
+
+def age_bounds(df) -> list[int]:
+    # The filter pages' age slider range, stored in their bundle's layout values
+    return [int(df["age"].min()), int(df["age"].max())]
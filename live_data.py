@@ -0,0 +1,235 @@
+# live_data.py
+
+import io
+import os
+import threading
+import time
+from typing import Callable
+
+import pandas as pd
+import polars as pl
+
+from background import (DATA_DIR, RESULT_EXPIRE_SECONDS, SERIES_DIR, publish_source_version, result_cache,
+                        run_polars_job, scan_source_version, source_version)
+from data_loader import (compact_frame, participant_hourly_profile, prepare_train_data, query_frame, scan_participant,
+                         series_stamps)
+from feature_table import load_feature_table
+
+TRAIN_CSV = os.path.join(DATA_DIR, "train.csv")
+# The labels background jobs join against; they run forked and cannot query polars
+LABEL_COLUMNS = ["id", "age", "sex", "sii"]
+POLL_SECONDS = float(os.environ.get("PIU_RELOAD_SECONDS", "5"))
+# Bytes kept from the end of the last read, to check that a grown CSV was appended to
+# rather than rewritten
+CSV_TAIL_BYTES = 256
+
+# dataset name -> (source csv paths, build(tables) -> value)
+_builders = {}
+# dataset name -> current value. Values are never mutated; a refresh builds the new
+# value aside and swaps it in with one assignment, so readers see old or new, never half
+_datasets = {}
+# csv path -> {"frame", "header", "offset", "tail", "stamp"}
+_tables = {}
+_series = {"stamps": None, "version": None}
+_lock = threading.Lock()
+_watcher = None
+
+# Per-participant functions behind the series aggregates cached in result_cache under
+# (name, source_version()); a series change recomputes only the affected participants
+SERIES_AGGREGATES = {
+    "hourly-activity-profile": participant_hourly_profile,
+}
+# The participant feature table, cached the same way; it rebuilds only the changed
+# participants itself
+FEATURE_TABLE_AGGREGATE = "participant-features"
+
+
+def _read_csv(path: str, table: dict | None = None) -> dict:
+    # Reads only the appended bytes when the file grew and its previously read tail is
+    # unchanged; anything else (rewrite, truncation, bad delta) is a full read.
+    # Either read stops at the last complete line, so a row still being written is
+    # picked up by the next pass. A later row replaces earlier rows with the same id.
+    stat = os.stat(path)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    with open(path, "rb") as f:
+        if table is not None and stat.st_size > table["offset"]:
+            f.seek(table["offset"] - len(table["tail"]))
+            if f.read(len(table["tail"])) == table["tail"]:
+                delta = f.read()
+                end = delta.rfind(b"\n") + 1
+                try:
+                    new_rows = pl.read_csv(io.BytesIO(table["header"] + delta[:end].lstrip(b"\r\n")),
+                                           schema=table["frame"].schema)
+                except Exception as e:
+                    print(f"[RELOAD] {path}: could not parse appended rows ({e}), reading the whole file")
+                else:
+                    print(f"[RELOAD] {path}: {new_rows.height} appended rows")
+                    offset = table["offset"] + end
+                    return {
+                        "frame": pl.concat([table["frame"], new_rows]).unique("id", keep="last", maintain_order=True),
+                        "header": table["header"],
+                        "offset": offset,
+                        "tail": (table["tail"] + delta[:end])[-CSV_TAIL_BYTES:],
+                        "stamp": stamp,
+                    }
+            f.seek(0)
+        data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+
+    return {
+        "frame": pl.read_csv(io.BytesIO(data)).unique("id", keep="last", maintain_order=True),
+        "header": data[:data.find(b"\n") + 1],
+        "offset": len(data),
+        "tail": data[-CSV_TAIL_BYTES:],
+        "stamp": stamp,
+    }
+
+
+def register_dataset(name: str, sources: list[str], build: Callable[[dict[str, pl.DataFrame]], object]):
+    # build receives {path: polars frame} for every source csv and returns the value
+    # pages read with get_dataset(name)
+    _builders[name] = (sources, build)
+
+
+def get_dataset(name: str):
+    value = _datasets.get(name)
+    if value is not None:
+        return value
+
+    with _lock:
+        if name not in _datasets:
+            sources, build = _builders[name]
+            for path in sources:
+                if path not in _tables:
+                    _tables[path] = _read_csv(path)
+            _datasets[name] = build({path: _tables[path]["frame"] for path in sources})
+        return _datasets[name]
+
+
+def scan_dataset(name: str, columns: list[str] | None = None,
+                 filters: list[pl.Expr] | None = None) -> pl.LazyFrame:
+    # Lazy query over the current snapshot of a polars dataset; a reload swaps the
+    # snapshot, so one query never mixes old and new rows
+    return query_frame(get_dataset(name).lazy(), columns, filters)
+
+
+def dataset_view(name: str, columns: list[str] | None = None,
+                 filters: list[pl.Expr] | None = None) -> pd.DataFrame:
+    # Materializes only the requested columns of the matching rows
+    return scan_dataset(name, columns, filters).collect().to_pandas()
+
+
+def cached_series_aggregate(name: str, job, *args, set_progress=None, label: str = ""):
+    # Full series aggregates are computed once per data version in a polars job; after
+    # that the watcher keeps them current participant by participant
+    key = (name, source_version())
+    value = result_cache.get(key)
+    if value is None:
+        value = run_polars_job(job, *args, set_progress=set_progress, label=label)
+        result_cache.set(key, value, expire=RESULT_EXPIRE_SECONDS)
+    return value
+
+
+def _refresh_tables() -> list[str]:
+    # Re-read tables and rebuilt datasets are only swapped in once all of them are
+    # built, so a failed pass leaves every file looking changed to the next one
+    tables = {}
+    for path, table in list(_tables.items()):
+        if not os.path.exists(path):
+            continue
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != table["stamp"]:
+            tables[path] = _read_csv(path, table)
+
+    datasets = {}
+    for name, (sources, build) in _builders.items():
+        if name in _datasets and any(path in tables for path in sources):
+            datasets[name] = build({path: tables.get(path, _tables[path])["frame"] for path in sources})
+    _tables.update(tables)
+    _datasets.update(datasets)
+    return list(datasets)
+
+
+def _refresh_series(old_version: str | None, new_version: str) -> list[str]:
+    # Carries cached aggregates over to the new data version, recomputing only the
+    # participants whose series file was added, rewritten or removed
+    stamps = series_stamps(SERIES_DIR) if os.path.isdir(SERIES_DIR) else {}
+    old_stamps = _series["stamps"]
+    if old_stamps is None or old_version is None:
+        _series["stamps"] = stamps
+        return []
+
+    changed = [pid for pid, stamp in stamps.items() if old_stamps.get(pid) != stamp]
+    removed = set(old_stamps) - set(stamps)
+    if changed or removed:
+        print(f"[RELOAD] series: {len(changed)} new or changed, {len(removed)} removed participants")
+
+    updated = []
+    for name, per_participant in SERIES_AGGREGATES.items():
+        cached = result_cache.get((name, old_version))
+        if cached is None or result_cache.get((name, new_version)) is not None:
+            continue
+
+        if changed or removed:
+            rows = []
+            for pid in changed:
+                lf = scan_participant(SERIES_DIR, pid)
+                if lf is not None:
+                    rows.append(per_participant(lf, pid))
+            fresh = pl.concat(rows, how="diagonal_relaxed").to_pandas() if rows else cached.iloc[0:0]
+            kept = cached[~cached["id"].astype(str).isin(set(changed) | removed)]
+            cached = pd.concat([kept, fresh], ignore_index=True)
+            updated.append(name)
+        result_cache.set((name, new_version), cached, expire=RESULT_EXPIRE_SECONDS)
+    _series["stamps"] = stamps
+    return updated
+
+
+def _refresh_feature_table(old_version: str | None, new_version: str) -> list[str]:
+    # Only kept current once a page has asked for it under the previous version
+    if old_version is None or result_cache.get((FEATURE_TABLE_AGGREGATE, old_version)) is None:
+        return []
+    if result_cache.get((FEATURE_TABLE_AGGREGATE, new_version)) is None:
+        table = load_feature_table("train", build=True).to_pandas()
+        result_cache.set((FEATURE_TABLE_AGGREGATE, new_version), table, expire=RESULT_EXPIRE_SECONDS)
+    return [FEATURE_TABLE_AGGREGATE]
+
+
+def refresh() -> list[str]:
+    # One watcher pass: the only place the source files are scanned. The new version is
+    # recorded and published after the refreshed data is in place, so a request never
+    # pairs the new version with old data and a failed pass is retried on the next one.
+    # Returns the datasets and aggregates that were swapped
+    version = scan_source_version()
+    with _lock:
+        if version == _series["version"]:
+            return []
+        swapped = (_refresh_tables() + _refresh_series(_series["version"], version)
+                   + _refresh_feature_table(_series["version"], version))
+        _series["version"] = version
+        publish_source_version(version)
+    if swapped:
+        print(f"[RELOAD] swapped in {', '.join(swapped)}")
+    return swapped
+
+
+def _watch(interval: float):
+    while True:
+        try:
+            refresh()
+        except Exception as e:
+            print(f"❌ Reload failed: {e}")
+        time.sleep(interval)
+
+
+def start_watcher(interval: float = POLL_SECONDS):
+    # Polls the source files and swaps refreshed data in while the server keeps running
+    global _watcher
+    if _watcher is None and interval > 0:
+        _watcher = threading.Thread(target=_watch, args=(interval,), name="live-data-watcher", daemon=True)
+        _watcher.start()
+
+
+register_dataset("train", [TRAIN_CSV], lambda tables: compact_frame(prepare_train_data(tables[TRAIN_CSV]), "train"))
+register_dataset("train-labels", [TRAIN_CSV],
+                 lambda tables: compact_frame(prepare_train_data(tables[TRAIN_CSV]).select(LABEL_COLUMNS), "train labels").to_pandas())
@@ -1,27 +1,52 @@
 # pages/actigraphy_dashboard.py
 
-from dash import dcc, html, register_page
+from functools import lru_cache
+
+from dash import dcc, html, Input, Output, register_page, callback
 import dash_mantine_components as dmc
 import pandas as pd
 import plotly.express as px
 import plotly.figure_factory as ff
-from data_loader import batch_process_actigraphy_features, load_train_data
+from data_loader import hourly_activity_profile
+from feature_table import DAILY_COLUMNS, load_feature_table
+from background import result_cache, source_version
+from live_data import FEATURE_TABLE_AGGREGATE, cached_series_aggregate, get_dataset
+from figure_bundle import page_bundle
+from payload import compact_figure, compact_figures
 
 register_page(__name__, path="/actigraphy")
 
-# Load data efficiently using batch processing
-daily_df = batch_process_actigraphy_features("child-mind-institute-problematic-internet-use/series_train.parquet").to_pandas()
-train_df = load_train_data("child-mind-institute-problematic-internet-use/train.csv").to_pandas()
-
-if "id" not in daily_df.columns:
-    raise ValueError("No actigraphy features could be extracted. Check preprocessing or data paths.")
-
-# Merge actigraphy features with train labels (SII etc.)
-df = pd.merge(daily_df, train_df, on="id")
+SERIES_DIR = "child-mind-institute-problematic-internet-use/series_train.parquet"
+CIRCADIAN_METRICS = {
+    "m10": "M10 (most active 10 h, ENMO)",
+    "l5": "L5 (least active 5 h, ENMO)",
+    "relative_amplitude": "Relative Amplitude",
+    "interdaily_stability": "Interdaily Stability",
+    "intradaily_variability": "Intradaily Variability",
+    "sleep_onset_hour": "Estimated Sleep Onset (hour)",
+    "sleep_hours": "Estimated Sleep Window (hours)",
+}
+
+# Labels are loaded at import: background jobs run in forked processes, which must not
+# touch polars themselves, and read whichever snapshot is current when they fork
+get_dataset("train-labels")
+
+# Participant feature table, ready-joined with the train labels (SII etc.)
+def participant_features(set_progress=None):
+    return cached_series_aggregate(FEATURE_TABLE_AGGREGATE, load_feature_table, "train", True,
+                                   set_progress=set_progress, label="Participant features")
+
+# One row per participant with actigraphy: the daily aggregates averaged over its days
+def daily_view(features):
+    if "daily_mean_enmo" not in features.columns or features["daily_mean_enmo"].isna().all():
+        raise ValueError("No actigraphy features could be extracted. Check preprocessing or data paths.")
+    daily = features.loc[features["daily_mean_enmo"].notna(), ["id", "sii"] + [f"daily_{col}" for col in DAILY_COLUMNS]]
+    daily = daily.rename(columns={f"daily_{col}": col for col in DAILY_COLUMNS})
+    # Clip outliers and improve readability with log scale
+    daily["mean_light_clipped"] = daily["mean_light"].clip(upper=daily["mean_light"].quantile(0.95))
+    return daily
 
 # KDE Plot: Mean Light
-# Clip outliers and improve readability with log scale
-df["mean_light_clipped"] = df["mean_light"].clip(upper=df["mean_light"].quantile(0.95))
 def kde_plot(dataframe, column, label):
     groups = [dataframe[dataframe["sii"] == lvl][column] for lvl in sorted(dataframe["sii"].unique())]
     labels = [f"SII {lvl}" for lvl in sorted(dataframe["sii"].unique())]
@@ -32,14 +57,9 @@ def kde_plot(dataframe, column, label):
     )
     return fig
 
-# Line Plot: Hourly ENMO pattern
-def time_trend_plot(dataframe, metric):
-    df_hour = dataframe.copy()
-    print("df_hour columns:", df_hour.columns)
-
-    if "hour" not in df_hour.columns:
-        df_hour["hour"] = ((df_hour["day"] / 1e9) // 3600).astype(int) % 24
-
+# Line Plot: Hourly pattern from the per-participant hourly profile
+def time_trend_plot(profile, train, metric):
+    df_hour = pd.merge(profile, train[["id", "sii"]], on="id")
     avg_hourly = df_hour.groupby(["hour", "sii"])[metric].mean().reset_index()
 
     fig = px.line(
@@ -73,35 +93,153 @@ def create_main_charts(dataframe):
     )
     return fig_enmo, fig_night
 
-fig_enmo, fig_night = create_main_charts(df)
-fig_kde = kde_plot(df, "mean_light_clipped", "Mean Light")
-fig_line = time_trend_plot(df, "mean_enmo")
-fig_violin = night_activity_violin(df)
-
-layout = dmc.Container(fluid=True, children=[
-    dmc.Title("Actigraphy Patterns & PIU Severity Dashboard", order=2),
-    dmc.Space(h=20),
-
-    dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-        dmc.Title("Daily Movement vs SII", order=4),
-        dcc.Graph(figure=fig_enmo, config={"displayModeBar": False})
-    ]),
-    dmc.Space(h=20),
-
-    dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-        dmc.Title("Light Distribution by SII (KDE)", order=4),
-        dcc.Graph(figure=fig_kde, config={"displayModeBar": False})
-    ]),
-    dmc.Space(h=20),
-
-    dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-        dmc.Title("ENMO Hourly Pattern by SII", order=4),
-        dcc.Graph(figure=fig_line, config={"displayModeBar": False})
-    ]),
-    dmc.Space(h=20),
-
-    dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-        dmc.Title("Night Activity % across SII Levels", order=4),
-        dcc.Graph(figure=fig_violin, config={"displayModeBar": False})
+# Circadian rhythm metric (one value per participant) by SII
+def circadian_box(features, metric):
+    # Participants without actigraphy have no circadian metrics
+    fig = px.box(
+        features[features[metric].notna()], x="sii", y=metric, color="sii", points="all",
+        title=f"{CIRCADIAN_METRICS[metric]} across SII Levels",
+        labels={"sii": "SII Level", metric: CIRCADIAN_METRICS[metric]}
+    )
+    return fig
+
+def create_daily_figures(dataframe):
+    fig_enmo, _ = create_main_charts(dataframe)
+    fig_kde = kde_plot(dataframe, "mean_light_clipped", "Mean Light")
+    fig_violin = night_activity_violin(dataframe)
+    return fig_enmo, fig_kde, fig_violin
+
+def build_default_bundle():
+    # Also seeds the cached feature table the reload watcher keeps current
+    df = daily_view(participant_features())
+    return {"figures": dict(zip(["enmo", "kde", "violin"], create_daily_figures(df))), "layout": {}}
+
+bundle = page_bundle("actigraphy", build_default_bundle)
+bundle_version = source_version()
+
+@lru_cache(maxsize=1)
+def live_daily_figures(version):
+    features = result_cache.get((FEATURE_TABLE_AGGREGATE, version))
+    return compact_figures(*create_daily_figures(daily_view(features)))
+
+def default_daily_figures():
+    # The bundle while it matches the data; after a live reload, the feature table the
+    # watcher rebuilt for the new version (until then the last bundle is shown)
+    version = source_version()
+    if version != bundle_version and result_cache.get((FEATURE_TABLE_AGGREGATE, version)) is not None:
+        return live_daily_figures(version)
+    return tuple(bundle["figures"][name] for name in ("enmo", "kde", "violin"))
+
+def progress_panel(prefix):
+    return dmc.Stack(gap=4, children=[
+        dmc.Progress(id=f"{prefix}-progress", value=0, size="sm"),
+        dmc.Text(id=f"{prefix}-progress-label", size="xs", c="dimmed")
     ])
-])
+
+def layout(**_kwargs):
+    fig_enmo, fig_kde, fig_violin = default_daily_figures()
+    return dmc.Container(fluid=True, children=[
+        dmc.Title("Actigraphy Patterns & PIU Severity Dashboard", order=2),
+        dmc.Space(h=20),
+
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Group(justify="space-between", children=[
+                dmc.Text("Rebuild the participant features from the raw series (runs in the background).", size="sm"),
+                dmc.Group(children=[
+                    dmc.Button("Recompute features", id="actigraphy-recompute-btn", variant="light"),
+                    dmc.Button("Cancel", id="actigraphy-cancel-btn", variant="subtle", color="red", disabled=True)
+                ])
+            ]),
+            dmc.Space(h=10),
+            progress_panel("actigraphy-recompute")
+        ]),
+        dmc.Space(h=20),
+
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Title("Daily Movement vs SII", order=4),
+            dcc.Graph(id="actigraphy-enmo-graph", figure=fig_enmo, config={"displayModeBar": False})
+        ]),
+        dmc.Space(h=20),
+
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Title("Light Distribution by SII (KDE)", order=4),
+            dcc.Graph(id="actigraphy-kde-graph", figure=fig_kde, config={"displayModeBar": False})
+        ]),
+        dmc.Space(h=20),
+
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Group(justify="space-between", children=[
+                dmc.Title("Hourly Pattern by SII", order=4),
+                dmc.SegmentedControl(
+                    id="actigraphy-hourly-metric", value="enmo",
+                    data=[{"label": "ENMO", "value": "enmo"}, {"label": "Light", "value": "light"},
+                          {"label": "Angle-Z", "value": "anglez"}]
+                )
+            ]),
+            progress_panel("actigraphy-hourly"),
+            dcc.Graph(id="actigraphy-hourly-graph", config={"displayModeBar": False})
+        ]),
+        dmc.Space(h=20),
+
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Group(justify="space-between", children=[
+                dmc.Title("Circadian Rhythm by SII", order=4),
+                dmc.Select(
+                    id="actigraphy-circadian-metric", value="m10", allowDeselect=False,
+                    data=[{"label": label, "value": value} for value, label in CIRCADIAN_METRICS.items()]
+                )
+            ]),
+            progress_panel("actigraphy-circadian"),
+            dcc.Graph(id="actigraphy-circadian-graph", config={"displayModeBar": False})
+        ]),
+        dmc.Space(h=20),
+
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Title("Night Activity % across SII Levels", order=4),
+            dcc.Graph(id="actigraphy-violin-graph", figure=fig_violin, config={"displayModeBar": False})
+        ])
+    ])
+
+@callback(
+    Output("actigraphy-enmo-graph", "figure"),
+    Output("actigraphy-kde-graph", "figure"),
+    Output("actigraphy-violin-graph", "figure"),
+    Input("actigraphy-recompute-btn", "n_clicks"),
+    background=True,
+    running=[
+        (Output("actigraphy-recompute-btn", "disabled"), True, False),
+        (Output("actigraphy-cancel-btn", "disabled"), False, True),
+    ],
+    cancel=[Input("actigraphy-cancel-btn", "n_clicks")],
+    progress=[Output("actigraphy-recompute-progress", "value"), Output("actigraphy-recompute-progress-label", "children")],
+    cache_args_to_ignore=[0],
+    prevent_initial_call=True
+)
+def recompute_actigraphy_features(set_progress, _n_clicks):
+    # n_clicks is excluded from the cache key, so repeated clicks reuse the last
+    # result until the source data changes
+    return compact_figures(*create_daily_figures(daily_view(participant_features(set_progress))))
+
+@callback(
+    Output("actigraphy-hourly-graph", "figure"),
+    Input("actigraphy-hourly-metric", "value"),
+    background=True,
+    running=[(Output("actigraphy-hourly-metric", "disabled"), True, False)],
+    progress=[Output("actigraphy-hourly-progress", "value"), Output("actigraphy-hourly-progress-label", "children")]
+)
+def update_hourly_pattern(set_progress, metric):
+    # One scan builds the profile for every metric; keep it in the shared result cache
+    profile = cached_series_aggregate("hourly-activity-profile", hourly_activity_profile, SERIES_DIR,
+                                      set_progress=set_progress, label="Hourly profile")
+    return compact_figure(time_trend_plot(profile, get_dataset("train-labels"), metric))
+
+@callback(
+    Output("actigraphy-circadian-graph", "figure"),
+    Input("actigraphy-circadian-metric", "value"),
+    background=True,
+    running=[(Output("actigraphy-circadian-metric", "disabled"), True, False)],
+    progress=[Output("actigraphy-circadian-progress", "value"), Output("actigraphy-circadian-progress-label", "children")]
+)
+def update_circadian_pattern(set_progress, metric):
+    # Circadian metrics and SII come ready-joined from the materialized feature table
+    return compact_figure(circadian_box(participant_features(set_progress), metric))
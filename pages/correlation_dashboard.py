@@ -0,0 +1,124 @@
+# pages/correlation_dashboard.py (feature / PIU severity correlations)
+
+from dash import dcc, html, Input, Output, register_page, callback
+import dash_mantine_components as dmc
+import plotly.express as px
+from correlation import correlations, top_features, TARGETS
+from live_data import dataset_view
+from figure_bundle import age_bounds, bundle_view
+from payload import compact_figures
+
+register_page(__name__, path="/correlations")
+
+TOP_N = 20
+HEATMAP_N = 15
+TARGET_LABELS = {"PCIAT-PCIAT_Total": "PCIAT Total", "sii": "SII"}
+
+def short_name(column):
+    return column.replace("_", " ").split("-", 1)[-1] if "-" in column else column
+
+def create_correlation_figures(result, target, method):
+    top = top_features(result, target, TOP_N).iloc[::-1]
+    fig_bar = px.bar(
+        top.reset_index(names="feature"), x="r", y="feature", orientation="h",
+        color="r", color_continuous_scale="RdBu_r", range_color=[-1, 1],
+        hover_data={"n": True},
+        title=f"Top {len(top)} Features by |{method.title()} r| with {TARGET_LABELS[target]}",
+        labels={"r": f"{method.title()} r", "feature": "", "n": "Complete pairs"}
+    )
+    fig_bar.update_layout(height=max(400, 24 * len(top) + 120), coloraxis_showscale=False)
+
+    features = list(top.index[::-1][:HEATMAP_N])
+    matrix = result["matrix"].loc[features, features]
+    fig_heat = px.imshow(
+        matrix.rename(index=short_name, columns=short_name).round(2),
+        color_continuous_scale="RdBu_r", zmin=-1, zmax=1, text_auto=True, aspect="auto",
+        title=f"Correlations among the Top {len(features)} Features ({result['rows']} participants)"
+    )
+    fig_heat.update_layout(height=600)
+    return fig_bar, fig_heat
+
+def build_default_bundle():
+    df = dataset_view("train", ["age"])
+    age_range = age_bounds(df)
+    figures = create_correlation_figures(correlations(age_range), TARGETS[0], "pearson")
+    return {
+        "figures": dict(zip(["bar", "heatmap"], figures)),
+        "layout": {"age_range": age_range}
+    }
+
+default_view = bundle_view("correlations", build_default_bundle, ["bar", "heatmap"])
+
+def layout(**_kwargs):
+    initial_figs, defaults = default_view()
+    age_min, age_max = defaults["age_range"]
+    return dmc.Container(fluid=True, children=[
+        dmc.Title("Feature Correlations with PIU Severity", order=2),
+        dmc.Space(h=20),
+
+        html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "16px"}, children=[
+            html.Div(style={"flex": "2 1 300px", "minWidth": "300px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Filter by Age Range:", style={"fontWeight": 500}),
+                    dmc.RangeSlider(
+                        id="age-range-slider", min=age_min, max=age_max,
+                        value=[age_min, age_max], step=1,
+                        marks=[{"value": v, "label": str(v)} for v in range(age_min, age_max+1, 5)],
+                        minRange=0
+                    )
+                ])
+            ]),
+            html.Div(style={"flex": "1 1 200px", "minWidth": "200px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Gender:", style={"fontWeight": 500}),
+                    dmc.SegmentedControl(
+                        id="gender-filter", value="all",
+                        data=[{"label": "All", "value": "all"}, {"label": "Male", "value": "M"}, {"label": "Female", "value": "F"}]
+                    )
+                ])
+            ]),
+            html.Div(style={"flex": "1 1 200px", "minWidth": "200px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Target:", style={"fontWeight": 500}),
+                    dmc.SegmentedControl(
+                        id="correlation-target", value=TARGETS[0],
+                        data=[{"label": TARGET_LABELS[t], "value": t} for t in TARGETS]
+                    )
+                ])
+            ]),
+            html.Div(style={"flex": "1 1 200px", "minWidth": "200px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Method:", style={"fontWeight": 500}),
+                    dmc.SegmentedControl(
+                        id="correlation-method", value="pearson",
+                        data=[{"label": "Pearson", "value": "pearson"}, {"label": "Spearman", "value": "spearman"}]
+                    )
+                ])
+            ])
+        ]),
+
+        dmc.Space(h=20),
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Title("Strongest Feature Correlations", order=4),
+            dmc.Text("Pairwise-complete: each value uses every participant with both fields recorded.", size="sm", c="dimmed"),
+            dcc.Graph(id="correlation-bar-graph", figure=initial_figs[0], config={"displayModeBar": False})
+        ]),
+
+        dmc.Space(h=20),
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Title("Feature Correlation Matrix", order=4),
+            dcc.Graph(id="correlation-heatmap-graph", figure=initial_figs[1], config={"displayModeBar": False})
+        ])
+    ])
+
+@callback(
+    Output("correlation-bar-graph", "figure"),
+    Output("correlation-heatmap-graph", "figure"),
+    Input("age-range-slider", "value"),
+    Input("gender-filter", "value"),
+    Input("correlation-target", "value"),
+    Input("correlation-method", "value")
+)
+def update_correlations(age_range, gender, target, method):
+    result = correlations(age_range, gender, method)
+    return compact_figures(*create_correlation_figures(result, target, method))
@@ -6,12 +6,17 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from data_loader import load_train_data
+from data_loader import train_filters
+from live_data import dataset_view
+from figure_bundle import age_bounds, bundle_view
+from payload import compact_figures
 
 register_page(__name__, path="/demographics")
 
-pl_df = load_train_data("child-mind-institute-problematic-internet-use/train.csv")
-df = pl_df.to_pandas()
+COLUMNS = ["age", "sex", "sii"]
+
+def get_df(age_range=None, gender="all"):
+    return dataset_view("train", COLUMNS, train_filters(age_range, gender))
 
 def categorize_age(age):
     if age <= 12:
@@ -51,56 +56,67 @@ def create_figures(dataframe):
 
     return fig_age, fig_gender, fig_agegroup
 
-initial_figs = create_figures(df)
-
-layout = dmc.Container(fluid=True, children=[
-    dmc.Title("Demographics & PIU Severity Dashboard", order=2),
-    dmc.Space(h=20),
-    html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "16px"}, children=[
-        html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
-            dmc.Stack(gap=5, children=[
-                dmc.Text("Filter by Age Range:", style={"fontWeight": 500}),
-                dmc.RangeSlider(
-                    id="age-range-slider", min=int(df['age'].min()), max=int(df['age'].max()),
-                    value=[int(df['age'].min()), int(df['age'].max())], step=1,
-                    marks=[{"value": v, "label": str(v)} for v in range(int(df['age'].min()), int(df['age'].max())+1, 5)],
-                    minRange=0
-                )
+def build_default_bundle():
+    df = get_df()
+    figures = create_figures(df.copy())
+    return {
+        "figures": dict(zip(['age_dist', 'gender_sii', 'agegroup_severity'], figures)),
+        "layout": {"age_range": age_bounds(df)}
+    }
+
+default_view = bundle_view("demographics", build_default_bundle, ['age_dist', 'gender_sii', 'agegroup_severity'])
+
+def layout(**_kwargs):
+    initial_figs, defaults = default_view()
+    age_min, age_max = defaults["age_range"]
+    return dmc.Container(fluid=True, children=[
+        dmc.Title("Demographics & PIU Severity Dashboard", order=2),
+        dmc.Space(h=20),
+        html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "16px"}, children=[
+            html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Filter by Age Range:", style={"fontWeight": 500}),
+                    dmc.RangeSlider(
+                        id="age-range-slider", min=age_min, max=age_max,
+                        value=[age_min, age_max], step=1,
+                        marks=[{"value": v, "label": str(v)} for v in range(age_min, age_max+1, 5)],
+                        minRange=0
+                    )
+                ])
+            ]),
+            html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Gender:", style={"fontWeight": 500}),
+                    dmc.SegmentedControl(id="gender-filter", value="all",
+                        data=[{"label": "All", "value": "all"},
+                              {"label": "Male", "value": "M"},
+                              {"label": "Female", "value": "F"}])
+                ])
             ])
         ]),
-        html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
-            dmc.Stack(gap=5, children=[
-                dmc.Text("Gender:", style={"fontWeight": 500}),
-                dmc.SegmentedControl(id="gender-filter", value="all",
-                    data=[{"label": "All", "value": "all"},
-                          {"label": "Male", "value": "M"},
-                          {"label": "Female", "value": "F"}])
-            ])
-        ])
-    ]),
-
-    dmc.Space(h=20),
-    html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "20px"}, children=[
-        html.Div(style={"flex": "1 1 500px", "minWidth": "300px"}, children=[
-            dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-                dmc.Title("Age Distribution & SII Trend", order=4),
-                dcc.Graph(id="age-dist-graph", figure=initial_figs[0], config={"displayModeBar": False})
+
+        dmc.Space(h=20),
+        html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "20px"}, children=[
+            html.Div(style={"flex": "1 1 500px", "minWidth": "300px"}, children=[
+                dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+                    dmc.Title("Age Distribution & SII Trend", order=4),
+                    dcc.Graph(id="age-dist-graph", figure=initial_figs[0], config={"displayModeBar": False})
+                ])
+            ]),
+            html.Div(style={"flex": "1 1 500px", "minWidth": "300px"}, children=[
+                dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+                    dmc.Title("Gender-wise SII Comparison", order=4),
+                    dcc.Graph(id="gender-sii-graph", figure=initial_figs[1], config={"displayModeBar": False})
+                ])
             ])
         ]),
-        html.Div(style={"flex": "1 1 500px", "minWidth": "300px"}, children=[
-            dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-                dmc.Title("Gender-wise SII Comparison", order=4),
-                dcc.Graph(id="gender-sii-graph", figure=initial_figs[1], config={"displayModeBar": False})
-            ])
-        ])
-    ]),
 
-    dmc.Space(h=20),
-    dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-        dmc.Title("Severity by Age Groups", order=4),
-        dcc.Graph(id="agegroup-severity-graph", figure=initial_figs[2], config={"displayModeBar": False})
+        dmc.Space(h=20),
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Title("Severity by Age Groups", order=4),
+            dcc.Graph(id="agegroup-severity-graph", figure=initial_figs[2], config={"displayModeBar": False})
+        ])
     ])
-])
 
 @callback(
     Output("age-dist-graph", "figure"),
@@ -110,10 +126,5 @@ layout = dmc.Container(fluid=True, children=[
     Input("gender-filter", "value")
 )
 def update_charts(age_range, gender):
-    min_age, max_age = age_range
-    filtered_df = df[(df['age'] >= min_age) & (df['age'] <= max_age)].copy()
-    if gender == "M":
-        filtered_df = filtered_df[filtered_df['sex'] == 1]
-    elif gender == "F":
-        filtered_df = filtered_df[filtered_df['sex'] == 0]
-    return create_figures(filtered_df)
+    filtered_df = get_df(age_range, gender)
+    return compact_figures(*create_figures(filtered_df))
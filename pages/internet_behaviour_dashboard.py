@@ -3,17 +3,23 @@
 from dash import dcc, html, Input, Output, register_page, callback
 import dash_mantine_components as dmc
 import pandas as pd
+import polars as pl
 import plotly.express as px
-from data_loader import load_train_data
+from data_loader import train_filters
+from live_data import dataset_view
+from figure_bundle import age_bounds, bundle_view
+from payload import compact_figures
 
 register_page(__name__, path="/internet")
 
 # Load and preprocess data
-pl_df = load_train_data("child-mind-institute-problematic-internet-use/train.csv")
-df = pl_df.to_pandas()
+COLUMNS = ["age", "sex", "sii", "PreInt_EduHx-computerinternet_hoursday"]
 
-# Clean data
-df = df[df["sii"].notna() & df["PreInt_EduHx-computerinternet_hoursday"].notna()]
+def get_df(age_range=None, gender="all"):
+    filters = train_filters(age_range, gender)
+    # Clean data
+    filters += [pl.col("sii").is_not_null(), pl.col("PreInt_EduHx-computerinternet_hoursday").is_not_null()]
+    return dataset_view("train", COLUMNS, filters)
 
 def create_behavior_figures(dataframe):
     gender_map = {0: "Female", 1: "Male"}
@@ -44,57 +50,68 @@ def create_behavior_figures(dataframe):
 
     return fig_box, fig_bar, fig_line
 
-initial_figs = create_behavior_figures(df)
-
-layout = dmc.Container(fluid=True, children=[
-    dmc.Title("Internet Usage Behavior & PIU Severity Dashboard", order=2),
-    dmc.Space(h=20),
-
-    html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "16px"}, children=[
-        html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
-            dmc.Stack(gap=5, children=[
-                dmc.Text("Filter by Age Range:", style={"fontWeight": 500}),
-                dmc.RangeSlider(
-                    id="age-range-slider", min=int(df['age'].min()), max=int(df['age'].max()),
-                    value=[int(df['age'].min()), int(df['age'].max())], step=1,
-                    marks=[{"value": v, "label": str(v)} for v in range(int(df['age'].min()), int(df['age'].max())+1, 5)],
-                    minRange=0
-                )
+def build_default_bundle():
+    df = get_df()
+    figures = create_behavior_figures(df.copy())
+    return {
+        "figures": dict(zip(['box', 'bar', 'line'], figures)),
+        "layout": {"age_range": age_bounds(df)}
+    }
+
+default_view = bundle_view("internet", build_default_bundle, ['box', 'bar', 'line'])
+
+def layout(**_kwargs):
+    initial_figs, defaults = default_view()
+    age_min, age_max = defaults["age_range"]
+    return dmc.Container(fluid=True, children=[
+        dmc.Title("Internet Usage Behavior & PIU Severity Dashboard", order=2),
+        dmc.Space(h=20),
+
+        html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "16px"}, children=[
+            html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Filter by Age Range:", style={"fontWeight": 500}),
+                    dmc.RangeSlider(
+                        id="age-range-slider", min=age_min, max=age_max,
+                        value=[age_min, age_max], step=1,
+                        marks=[{"value": v, "label": str(v)} for v in range(age_min, age_max+1, 5)],
+                        minRange=0
+                    )
+                ])
+            ]),
+            html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Gender:", style={"fontWeight": 500}),
+                    dmc.SegmentedControl(
+                        id="gender-filter", value="all",
+                        data=[{"label": "All", "value": "all"}, {"label": "Male", "value": "M"}, {"label": "Female", "value": "F"}]
+                    )
+                ])
             ])
         ]),
-        html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
-            dmc.Stack(gap=5, children=[
-                dmc.Text("Gender:", style={"fontWeight": 500}),
-                dmc.SegmentedControl(
-                    id="gender-filter", value="all",
-                    data=[{"label": "All", "value": "all"}, {"label": "Male", "value": "M"}, {"label": "Female", "value": "F"}]
-                )
-            ])
-        ])
-    ]),
-
-    dmc.Space(h=20),
-    html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "20px"}, children=[
-        html.Div(style={"flex": "1 1 500px", "minWidth": "300px"}, children=[
-            dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-                dmc.Title("Internet Use by SII", order=4),
-                dcc.Graph(id="internet-box-graph", figure=initial_figs[0], config={"displayModeBar": False})
+
+        dmc.Space(h=20),
+        html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "20px"}, children=[
+            html.Div(style={"flex": "1 1 500px", "minWidth": "300px"}, children=[
+                dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+                    dmc.Title("Internet Use by SII", order=4),
+                    dcc.Graph(id="internet-box-graph", figure=initial_figs[0], config={"displayModeBar": False})
+                ])
+            ]),
+            html.Div(style={"flex": "1 1 500px", "minWidth": "300px"}, children=[
+                dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+                    dmc.Title("Avg Internet Hours by SII", order=4),
+                    dcc.Graph(id="internet-bar-graph", figure=initial_figs[1], config={"displayModeBar": False})
+                ])
             ])
         ]),
-        html.Div(style={"flex": "1 1 500px", "minWidth": "300px"}, children=[
-            dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-                dmc.Title("Avg Internet Hours by SII", order=4),
-                dcc.Graph(id="internet-bar-graph", figure=initial_figs[1], config={"displayModeBar": False})
-            ])
-        ])
-    ]),
 
-    dmc.Space(h=20),
-    dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-        dmc.Title("Avg Internet Use by Age", order=4),
-        dcc.Graph(id="internet-line-graph", figure=initial_figs[2], config={"displayModeBar": False})
+        dmc.Space(h=20),
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Title("Avg Internet Use by Age", order=4),
+            dcc.Graph(id="internet-line-graph", figure=initial_figs[2], config={"displayModeBar": False})
+        ])
     ])
-])
 
 @callback(
     Output("internet-box-graph", "figure"),
@@ -104,10 +121,5 @@ layout = dmc.Container(fluid=True, children=[
     Input("gender-filter", "value")
 )
 def update_behavior_figures(age_range, gender):
-    min_age, max_age = age_range
-    filtered_df = df[(df['age'] >= min_age) & (df['age'] <= max_age)].copy()
-    if gender == "M":
-        filtered_df = filtered_df[filtered_df['sex'] == 1]
-    elif gender == "F":
-        filtered_df = filtered_df[filtered_df['sex'] == 0]
-    return create_behavior_figures(filtered_df)
\ No newline at end of file
+    filtered_df = get_df(age_range, gender)
+    return compact_figures(*create_behavior_figures(filtered_df))
\ No newline at end of file
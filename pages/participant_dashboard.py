@@ -0,0 +1,115 @@
+# pages/participant_dashboard.py (single-participant actigraphy drill-down)
+
+from functools import lru_cache
+
+from dash import dcc, html, Input, Output, register_page, callback
+import dash_mantine_components as dmc
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from data_loader import list_participant_ids, load_participant_traces, SERIES_COLUMNS
+from background import run_polars_job, source_version
+from live_data import get_dataset
+from payload import compact_figure
+
+register_page(__name__, path="/participant")
+
+SERIES_DIR = "child-mind-institute-problematic-internet-use/series_train.parquet"
+POINT_BUDGET = 2000
+TRACE_COLORS = {
+    "X": "purple", "Y": "purple", "Z": "purple",
+    "enmo": "forestgreen", "anglez": "lightblue",
+    "light": "orange", "non-wear_flag": "chocolate",
+}
+
+# Loaded at import: the drill-down runs in a forked background process, which must not
+# touch polars itself
+get_dataset("train-labels")
+
+
+@lru_cache(maxsize=1)
+def participant_ids(version):
+    # Re-listed only when the data version changes, so new participants show up after a live reload
+    return list_participant_ids(SERIES_DIR)
+
+
+def participant_title(participant_id):
+    labels = get_dataset("train-labels").astype({"id": str}).set_index("id")
+    if participant_id not in labels.index:
+        return f"id={participant_id}"
+    row = labels.loc[participant_id]
+    gender = {0: "Female", 1: "Male"}.get(row["sex"], "Unknown")
+    return f"id={participant_id}, {gender}, age={row['age']}, SII={row['sii']}"
+
+
+def create_participant_figure(participant_id, traces):
+    fig = make_subplots(rows=len(SERIES_COLUMNS), cols=1, shared_xaxes=True, vertical_spacing=0.02)
+    for row, col in enumerate(SERIES_COLUMNS, start=1):
+        x, y = traces[col]
+        fig.add_trace(go.Scattergl(x=x, y=y, mode="lines", name=col, line=dict(color=TRACE_COLORS[col], width=1)),
+                      row=row, col=1)
+        fig.update_yaxes(title_text=col, row=row, col=1)
+    fig.update_xaxes(title_text="Day (relative to PCIAT)", row=len(SERIES_COLUMNS), col=1)
+    fig.update_layout(
+        height=120 * len(SERIES_COLUMNS) + 80, showlegend=False,
+        title=participant_title(participant_id), margin=dict(t=60, b=40)
+    )
+    return fig
+
+
+def layout(**_kwargs):
+    ids = participant_ids(source_version())
+    return dmc.Container(fluid=True, children=[
+        dmc.Title("Participant Actigraphy Drill-down", order=2),
+        dmc.Space(h=20),
+        html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "16px"}, children=[
+            html.Div(style={"flex": "2 1 300px", "minWidth": "300px"}, children=[
+                dmc.Select(
+                    id="participant-select", label="Participant ID", searchable=True,
+                    data=ids, value=ids[0] if ids else None
+                )
+            ]),
+            html.Div(style={"flex": "1 1 150px", "minWidth": "150px"}, children=[
+                dmc.NumberInput(id="participant-day-start", label="From day", allowDecimal=False)
+            ]),
+            html.Div(style={"flex": "1 1 150px", "minWidth": "150px"}, children=[
+                dmc.NumberInput(id="participant-day-end", label="To day", allowDecimal=False)
+            ])
+        ]),
+
+        dmc.Space(h=20),
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Text(id="participant-summary", size="sm", c="dimmed"),
+            dcc.Graph(id="participant-series-graph", config={"displayModeBar": True})
+        ])
+    ])
+
+
+@callback(
+    Output("participant-series-graph", "figure"),
+    Output("participant-summary", "children"),
+    Input("participant-select", "value"),
+    Input("participant-day-start", "value"),
+    Input("participant-day-end", "value"),
+    background=True,
+    running=[(Output("participant-select", "disabled"), True, False)]
+)
+def update_participant_view(participant_id, day_start, day_end):
+    if not participant_id:
+        return go.Figure(), "Select a participant to view their actigraphy series."
+
+    day_range = None
+    if isinstance(day_start, int) or isinstance(day_end, int):
+        day_range = (
+            day_start if isinstance(day_start, int) else -(2 ** 15),
+            day_end if isinstance(day_end, int) else 2 ** 15 - 1
+        )
+
+    # Recently viewed participant / day-range combinations are served from the
+    # background manager's result cache without re-reading the partition
+    traces = run_polars_job(load_participant_traces, SERIES_DIR, participant_id, SERIES_COLUMNS, day_range, POINT_BUDGET)
+    if not traces:
+        return go.Figure(), f"No actigraphy recorded for id={participant_id} in the selected days."
+
+    days = traces["enmo"][0]
+    summary = f"Days {days.min():.1f} to {days.max():.1f}, up to {POINT_BUDGET} points per trace"
+    return compact_figure(create_participant_figure(participant_id, traces)), summary
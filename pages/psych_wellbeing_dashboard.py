@@ -4,13 +4,18 @@ from dash import dcc, html, Input, Output, register_page, callback
 import dash_mantine_components as dmc
 import pandas as pd
 import plotly.express as px
-from data_loader import load_train_data
+from data_loader import train_filters
+from live_data import dataset_view
+from figure_bundle import age_bounds, bundle_view
+from payload import compact_figure
 
 register_page(__name__, path="/psych")
 
 # Load and preprocess data
-pl_df = load_train_data("child-mind-institute-problematic-internet-use/train.csv")
-df = pl_df.to_pandas()
+COLUMNS = ["age", "sex", "sii", "SDS-SDS_Total_T", "SDS-SDS_Total_Raw", "CGAS-CGAS_Score"]
+
+def get_df(age_range=None, gender="all"):
+    return dataset_view("train", COLUMNS, train_filters(age_range, gender))
 
 # Normalize scores between 0-100 for bar chart comparison
 def normalize(series):
@@ -39,41 +44,51 @@ def create_grouped_bar(dataframe):
     )
     return fig
 
-initial_fig = create_grouped_bar(df)
+def build_default_bundle():
+    df = get_df()
+    return {
+        "figures": {"grouped_bar": create_grouped_bar(df.copy())},
+        "layout": {"age_range": age_bounds(df)}
+    }
+
+default_view = bundle_view("psych", build_default_bundle, ["grouped_bar"])
 
-layout = dmc.Container(fluid=True, children=[
-    dmc.Title("Psychological Wellbeing & PIU Severity Dashboard", order=2),
-    dmc.Space(h=20),
+def layout(**_kwargs):
+    (initial_fig,), defaults = default_view()
+    age_min, age_max = defaults["age_range"]
+    return dmc.Container(fluid=True, children=[
+        dmc.Title("Psychological Wellbeing & PIU Severity Dashboard", order=2),
+        dmc.Space(h=20),
 
-    html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "16px"}, children=[
-        html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
-            dmc.Stack(gap=5, children=[
-                dmc.Text("Filter by Age Range:", style={"fontWeight": 500}),
-                dmc.RangeSlider(
-                    id="age-range-slider", min=int(df['age'].min()), max=int(df['age'].max()),
-                    value=[int(df['age'].min()), int(df['age'].max())], step=1,
-                    marks=[{"value": v, "label": str(v)} for v in range(int(df['age'].min()), int(df['age'].max())+1, 5)],
-                    minRange=0
-                )
+        html.Div(style={"display": "flex", "flexWrap": "wrap", "gap": "16px"}, children=[
+            html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Filter by Age Range:", style={"fontWeight": 500}),
+                    dmc.RangeSlider(
+                        id="age-range-slider", min=age_min, max=age_max,
+                        value=[age_min, age_max], step=1,
+                        marks=[{"value": v, "label": str(v)} for v in range(age_min, age_max+1, 5)],
+                        minRange=0
+                    )
+                ])
+            ]),
+            html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
+                dmc.Stack(gap=5, children=[
+                    dmc.Text("Gender:", style={"fontWeight": 500}),
+                    dmc.SegmentedControl(
+                        id="gender-filter", value="all",
+                        data=[{"label": "All", "value": "all"}, {"label": "Male", "value": "M"}, {"label": "Female", "value": "F"}]
+                    )
+                ])
             ])
         ]),
-        html.Div(style={"flex": "1 1 300px", "minWidth": "300px"}, children=[
-            dmc.Stack(gap=5, children=[
-                dmc.Text("Gender:", style={"fontWeight": 500}),
-                dmc.SegmentedControl(
-                    id="gender-filter", value="all",
-                    data=[{"label": "All", "value": "all"}, {"label": "Male", "value": "M"}, {"label": "Female", "value": "F"}]
-                )
-            ])
-        ])
-    ]),
 
-    dmc.Space(h=20),
-    dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
-        dmc.Title("Grouped Psychological Profile Chart", order=4),
-        dcc.Graph(id="psych-bar-graph", figure=initial_fig, config={"displayModeBar": False})
+        dmc.Space(h=20),
+        dmc.Card(withBorder=True, shadow="sm", radius="md", p="md", children=[
+            dmc.Title("Grouped Psychological Profile Chart", order=4),
+            dcc.Graph(id="psych-bar-graph", figure=initial_fig, config={"displayModeBar": False})
+        ])
     ])
-])
 
 @callback(
     Output("psych-bar-graph", "figure"),
@@ -81,10 +96,5 @@ layout = dmc.Container(fluid=True, children=[
     Input("gender-filter", "value")
 )
 def update_psych_chart(age_range, gender):
-    min_age, max_age = age_range
-    filtered_df = df[(df['age'] >= min_age) & (df['age'] <= max_age)].copy()
-    if gender == "M":
-        filtered_df = filtered_df[filtered_df['sex'] == 1]
-    elif gender == "F":
-        filtered_df = filtered_df[filtered_df['sex'] == 0]
-    return create_grouped_bar(filtered_df)
+    filtered_df = get_df(age_range, gender)
+    return compact_figure(create_grouped_bar(filtered_df))
@@ -0,0 +1,310 @@
+# param_search.py
+# CPU-only hyperparameter search for the LightGBM / XGBoost / CatBoost ensemble members.
+# Random configurations (plus the notebook's hand-tuned one) are scored on stratified
+# folds with successive halving: each rung keeps the best 1/eta by threshold-optimized
+# QWK and gives the survivors eta times more boosting rounds. Trials run in parallel
+# worker processes and every finished trial is appended to a local results store:
+#   python param_search.py [lightgbm] [xgboost] [catboost] [--trials N] [--jobs N] [--budget SECONDS]
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+import uuid
+import warnings
+
+import numpy as np
+import polars as pl
+from catboost import CatBoostRegressor
+from lightgbm import LGBMRegressor
+from scipy.optimize import minimize
+from sklearn.metrics import cohen_kappa_score
+from sklearn.model_selection import StratifiedKFold
+from xgboost import XGBRegressor
+
+from feature_table import load_feature_table, table_version
+
+SEARCH_RESULTS_DIR = os.environ.get("PIU_SEARCH_RESULTS", "search_results")
+SEED = 42
+N_SPLITS = 5
+N_TRIALS = 27
+MIN_ROUNDS = 50
+MAX_ROUNDS = 450
+ETA = 3
+# PCIAT items make up the target; age / sex repeat the Basic_Demos fields
+EXCLUDED_PREFIXES = ("PCIAT-",)
+EXCLUDED_COLUMNS = ("id", "sii", "age", "sex")
+
+# param -> (kind, low, high); "int" and "float" are uniform, "log" is log-uniform
+SEARCH_SPACES = {
+    "lightgbm": {
+        "learning_rate": ("log", 0.01, 0.2),
+        "num_leaves": ("int", 8, 512),
+        "max_depth": ("int", 3, 12),
+        "min_child_samples": ("int", 5, 60),
+        "subsample": ("float", 0.5, 1.0),
+        "subsample_freq": ("int", 1, 8),
+        "colsample_bytree": ("float", 0.5, 1.0),
+        "reg_alpha": ("log", 1e-3, 20.0),
+        "reg_lambda": ("log", 1e-3, 20.0),
+    },
+    "xgboost": {
+        "learning_rate": ("log", 0.01, 0.2),
+        "max_depth": ("int", 3, 10),
+        "min_child_weight": ("log", 0.5, 20.0),
+        "subsample": ("float", 0.5, 1.0),
+        "colsample_bytree": ("float", 0.5, 1.0),
+        "reg_alpha": ("log", 1e-3, 20.0),
+        "reg_lambda": ("log", 1e-3, 20.0),
+    },
+    "catboost": {
+        "learning_rate": ("log", 0.01, 0.2),
+        "depth": ("int", 4, 10),
+        "l2_leaf_reg": ("log", 1.0, 30.0),
+        "random_strength": ("float", 0.0, 2.0),
+        "bagging_temperature": ("float", 0.0, 1.0),
+    },
+}
+
+# The notebook's hand-tuned parameters without the GPU settings, under the sklearn
+# names (LightGBM's bagging_fraction / bagging_freq are subsample / subsample_freq);
+# always trial 0, so a search never ends below the current configuration
+BASELINE_PARAMS = {
+    "lightgbm": {
+        "learning_rate": 0.046, "num_leaves": 478, "max_depth": 12, "min_child_samples": 13,
+        "subsample": 0.784, "subsample_freq": 4, "colsample_bytree": 0.893, "reg_alpha": 10.0, "reg_lambda": 0.01,
+    },
+    "xgboost": {
+        "learning_rate": 0.05, "max_depth": 6, "min_child_weight": 1.0, "subsample": 0.8,
+        "colsample_bytree": 0.8, "reg_alpha": 1.0, "reg_lambda": 5.0,
+    },
+    "catboost": {
+        "learning_rate": 0.05, "depth": 6, "l2_leaf_reg": 10.0,
+    },
+}
+
+
+def results_path() -> str:
+    return os.path.join(SEARCH_RESULTS_DIR, "trials.jsonl")
+
+
+def sample_params(space: dict, rng: np.random.Generator) -> dict:
+    params = {}
+    for name, (kind, low, high) in space.items():
+        if kind == "int":
+            params[name] = int(rng.integers(low, high + 1))
+        elif kind == "log":
+            params[name] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+
+def make_model(model: str, params: dict, rounds: int, threads: int):
+    # CPU-only estimators; threads is the trial's share of the host's cores
+    if model == "lightgbm":
+        return LGBMRegressor(**params, n_estimators=rounds, device_type="cpu",
+                             n_jobs=threads, random_state=SEED, verbose=-1)
+    if model == "xgboost":
+        return XGBRegressor(**params, n_estimators=rounds, tree_method="hist", device="cpu",
+                            n_jobs=threads, random_state=SEED)
+    if model == "catboost":
+        return CatBoostRegressor(**params, iterations=rounds, task_type="CPU", thread_count=threads,
+                                 random_seed=SEED, verbose=0, allow_writing_files=False)
+    raise ValueError(f"Unknown model: {model}")
+
+
+def training_data(table: pl.DataFrame) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    # Participants with a PCIAT total; Season enums enter as their category codes
+    labelled = table.filter(pl.col("PCIAT-PCIAT_Total").is_not_null())
+    features = [col for col, dtype in labelled.schema.items()
+                if (dtype.is_numeric() or isinstance(dtype, pl.Enum))
+                and not col.startswith(EXCLUDED_PREFIXES) and col not in EXCLUDED_COLUMNS]
+    X = labelled.select(pl.col(features).to_physical().cast(pl.Float32)).to_numpy()
+    y = labelled.get_column("sii").cast(pl.Int64).to_numpy()
+    return X, y, features
+
+
+def quadratic_weighted_kappa(y_true, y_pred) -> float:
+    return cohen_kappa_score(y_true, y_pred, weights="quadratic")
+
+
+def threshold_rounder(predictions: np.ndarray, thresholds) -> np.ndarray:
+    return np.where(predictions < thresholds[0], 0,
+                    np.where(predictions < thresholds[1], 1,
+                             np.where(predictions < thresholds[2], 2, 3)))
+
+
+def optimize_thresholds(y_true: np.ndarray, predictions: np.ndarray) -> np.ndarray:
+    result = minimize(lambda t: -quadratic_weighted_kappa(y_true, threshold_rounder(predictions, t)),
+                      x0=[0.5, 1.5, 2.5], method="Nelder-Mead")
+    return result.x
+
+
+# Set once per worker process, so the matrix is not pickled with every trial
+_worker_data = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, folds: list):
+    _worker_data.update(X=X, y=y, folds=folds)
+    # LightGBM names numpy columns itself, so sklearn warns on every predict
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def run_trial(model: str, params: dict, rounds: int, threads: int) -> dict:
+    # Out-of-fold predictions over every fold; the score is the QWK after threshold
+    # optimization, as in the notebook's TrainML
+    X, y, folds = _worker_data["X"], _worker_data["y"], _worker_data["folds"]
+    started = time.perf_counter()
+    try:
+        oof = np.zeros(len(y))
+        fold_qwk, fit_seconds = [], []
+        for train_idx, val_idx in folds:
+            estimator = make_model(model, params, rounds, threads)
+            fit_start = time.perf_counter()
+            estimator.fit(X[train_idx], y[train_idx])
+            fit_seconds.append(time.perf_counter() - fit_start)
+            oof[val_idx] = estimator.predict(X[val_idx])
+            fold_qwk.append(quadratic_weighted_kappa(y[val_idx], oof[val_idx].round().clip(0, 3).astype(int)))
+
+        thresholds = optimize_thresholds(y, oof)
+        return {
+            "qwk": float(quadratic_weighted_kappa(y, threshold_rounder(oof, thresholds))),
+            "qwk_rounded": float(quadratic_weighted_kappa(y, oof.round().clip(0, 3).astype(int))),
+            "fold_qwk": [float(v) for v in fold_qwk],
+            "thresholds": [float(v) for v in thresholds],
+            "fit_seconds": [round(v, 3) for v in fit_seconds],
+            "trial_seconds": round(time.perf_counter() - started, 3),
+            "error": None,
+        }
+    except Exception as e:
+        return {"qwk": None, "trial_seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+
+
+def _run_task(task: tuple) -> tuple:
+    trial, model, params, rounds, threads = task
+    return trial, run_trial(model, params, rounds, threads)
+
+
+def _make_pool(jobs: int, X: np.ndarray, y: np.ndarray, folds: list):
+    # Spawned workers: polars' thread pool does not survive a fork
+    return multiprocessing.get_context("spawn").Pool(jobs, initializer=_init_worker, initargs=(X, y, folds))
+
+
+def append_trial(record: dict):
+    # One JSON line per finished trial: an interrupted search keeps everything it finished
+    os.makedirs(SEARCH_RESULTS_DIR, exist_ok=True)
+    with open(results_path(), "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_trials(model: str | None = None) -> pl.DataFrame | None:
+    path = results_path()
+    if not os.path.exists(path):
+        return None
+    trials = pl.read_ndjson(path, infer_schema_length=None)
+    return trials if model is None else trials.filter(pl.col("model") == model)
+
+
+def best_params(model: str, data_version: str | None = None) -> dict | None:
+    # Parameters of the best trial at the largest round count searched, optionally
+    # only among trials on the given feature table version
+    trials = load_trials(model)
+    if trials is None:
+        return None
+    trials = trials.filter(pl.col("qwk").is_not_null())
+    if data_version is not None:
+        trials = trials.filter(pl.col("data_version") == data_version)
+    if trials.is_empty():
+        return None
+    best = trials.sort(["rounds", "qwk"], descending=True).row(0, named=True)
+    return {**json.loads(best["params"]), "rounds": best["rounds"]}
+
+
+def successive_halving(model: str, X: np.ndarray, y: np.ndarray, n_trials: int = N_TRIALS,
+                       min_rounds: int = MIN_ROUNDS, max_rounds: int = MAX_ROUNDS, eta: int = ETA,
+                       jobs: int | None = None, budget: float | None = None,
+                       data_version: str = "", seed: int = SEED) -> dict | None:
+    # Returns the best finished record of the last rung reached. With a budget, trials
+    # still running when it runs out are terminated and the search stops there
+    rng = np.random.default_rng(seed)
+    configs = [BASELINE_PARAMS[model]] + [sample_params(SEARCH_SPACES[model], rng) for _ in range(n_trials - 1)]
+    folds = list(StratifiedKFold(n_splits=N_SPLITS, shuffle=True, random_state=seed).split(X, y))
+    cores = os.cpu_count() or 1
+    jobs = min(jobs or cores, n_trials)
+    study = f"{model}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    deadline = None if budget is None else time.monotonic() + budget
+
+    survivors = list(enumerate(configs))
+    rounds, rung, best = min_rounds, 0, None
+    pool = _make_pool(jobs, X, y, folds)
+    try:
+        while survivors:
+            # Fewer survivors per rung get more threads each, keeping every core busy
+            threads = max(1, cores // min(jobs, len(survivors)))
+            tasks = [(trial, model, params, rounds, threads) for trial, params in survivors]
+            params_by_trial = dict(survivors)
+            rung_start = time.perf_counter()
+            scored = []
+            results = pool.imap_unordered(_run_task, tasks)
+            for _ in tasks:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    trial, result = results.next(timeout)
+                except multiprocessing.TimeoutError:
+                    print(f"[SEARCH] {model}: time budget used up in rung {rung}, "
+                          f"{len(tasks) - len(scored)} trials not finished")
+                    # Survivors scored in this rung may already beat the previous rung's best
+                    finished = [r for r in [*scored, best] if r is not None]
+                    return max(finished, key=lambda r: r["qwk"]) if finished else None
+                record = {
+                    "study": study, "model": model, "trial": trial, "rung": rung, "rounds": rounds,
+                    "threads": threads, "params": json.dumps(params_by_trial[trial]),
+                    "data_version": data_version, "finished_at": time.time(), **result,
+                }
+                append_trial(record)
+                if result["error"] is not None:
+                    print(f"❌ Trial {trial} failed: {result['error']}")
+                    continue
+                scored.append(record)
+
+            scored.sort(key=lambda r: r["qwk"], reverse=True)
+            if scored:
+                best = scored[0]
+                print(f"[SEARCH] {model} rung {rung}: {len(tasks)} trials x {rounds} rounds in "
+                      f"{time.perf_counter() - rung_start:.1f}s, best QWK {best['qwk']:.4f} (trial {best['trial']})")
+            if rounds >= max_rounds or len(scored) <= 1:
+                break
+            survivors = [(r["trial"], params_by_trial[r["trial"]]) for r in scored[:max(1, len(scored) // eta)]]
+            rounds, rung = min(max_rounds, rounds * eta), rung + 1
+    finally:
+        pool.terminate()
+        pool.join()
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CPU-only successive-halving search for the ensemble members.")
+    parser.add_argument("models", nargs="*", default=list(SEARCH_SPACES), help=", ".join(SEARCH_SPACES))
+    parser.add_argument("--trials", type=int, default=N_TRIALS)
+    parser.add_argument("--min-rounds", type=int, default=MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    parser.add_argument("--eta", type=int, default=ETA)
+    parser.add_argument("--jobs", type=int, default=None, help="parallel trials (default: one per core)")
+    parser.add_argument("--budget", type=float, default=None, help="wall-clock seconds per model")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args()
+    unknown = [m for m in args.models if m not in SEARCH_SPACES]
+    if unknown:
+        parser.error(f"unknown models: {', '.join(unknown)}")
+
+    X, y, features = training_data(load_feature_table("train", build=True))
+    version = table_version("train")
+    print(f"[SEARCH] {X.shape[0]} participants x {len(features)} features, results in {results_path()}")
+    for model in args.models:
+        best = successive_halving(model, X, y, args.trials, args.min_rounds, args.max_rounds, args.eta,
+                                  args.jobs, args.budget, version, args.seed)
+        if best is not None:
+            print(f"[SEARCH] {model}: best QWK {best['qwk']:.4f} with {best['rounds']} rounds: {best['params']}")
@@ -0,0 +1,132 @@
+# payload.py
+
+import base64
+import importlib.util
+import os
+import time
+
+import numpy as np
+import plotly.io as pio
+from flask import Flask, g, request
+from flask_compress import Compress
+
+# Decimal places kept for float data in figures sent to the browser
+FLOAT_DECIMALS = int(os.environ.get("PIU_FLOAT_DECIMALS", "4"))
+# Routes whose response sizes are tracked: callback outputs, the app layout and the callback graph
+TRACKED_PREFIXES = ("/_dash-update-component", "/_dash-layout", "/_dash-dependencies")
+
+# Dash serializes every callback response through plotly.io's JSON encoder
+if importlib.util.find_spec("orjson") is not None:
+    pio.json.config.default_engine = "orjson"
+
+_TYPED_DTYPES = {"f4": np.float32, "f8": np.float64}
+
+payload_stats = {}
+
+
+def _compact_floats(values: np.ndarray, decimals: int) -> dict:
+    # Round to the display precision and store as float32 when that loses nothing at
+    # that precision, as a base64 typed array (the plotly.js "bdata" form)
+    values = np.round(values.astype(np.float64), decimals)
+    narrow = values.astype(np.float32)
+    finite = np.isfinite(values)
+    if np.all(np.abs(narrow[finite] - values[finite]) <= 0.5 * 10 ** -decimals):
+        values = narrow
+    spec = {"dtype": "f4" if values.dtype == np.float32 else "f8",
+            "bdata": base64.b64encode(values.tobytes()).decode("ascii")}
+    if values.ndim > 1:
+        spec["shape"] = ", ".join(str(n) for n in values.shape)
+    return spec
+
+
+def _compact_value(value, decimals: int):
+    if isinstance(value, dict):
+        if value.get("dtype") in _TYPED_DTYPES and "bdata" in value:
+            values = np.frombuffer(base64.b64decode(value["bdata"]), dtype=_TYPED_DTYPES[value["dtype"]])
+            if "shape" in value:
+                values = values.reshape([int(n) for n in str(value["shape"]).split(",")])
+            return _compact_floats(values, decimals)
+        return {key: _compact_value(item, decimals) for key, item in value.items()}
+
+    if isinstance(value, np.ndarray) and value.dtype.kind == "f" and value.size:
+        return _compact_floats(value, decimals)
+
+    if isinstance(value, (float, np.floating)):
+        # Plain lists stay lists: some of them (pie domains, ranges) must not become typed arrays
+        return round(float(value), decimals)
+
+    if isinstance(value, (list, tuple)):
+        return [_compact_value(item, decimals) for item in value]
+
+    return value
+
+
+def compact_figure(fig, decimals: int = FLOAT_DECIMALS) -> dict:
+    # Figure dict for a dcc.Graph with float arrays rounded/narrowed and the layout
+    # template trimmed to the trace types actually drawn (plotly's default template
+    # ships styling for every trace type, repeated in every figure)
+    fig_dict = fig.to_plotly_json() if hasattr(fig, "to_plotly_json") else dict(fig)
+    data = [_compact_value(trace, decimals) for trace in fig_dict.get("data", [])]
+    layout = dict(fig_dict.get("layout", {}))
+
+    template = layout.get("template")
+    if template is not None:
+        template = template.to_plotly_json() if hasattr(template, "to_plotly_json") else dict(template)
+        trace_types = {trace.get("type", "scatter") for trace in data}
+        template["data"] = {name: specs for name, specs in template.get("data", {}).items() if name in trace_types}
+        layout["template"] = template
+
+    return {"data": data, "layout": layout}
+
+
+def compact_figures(*figs, decimals: int = FLOAT_DECIMALS) -> tuple:
+    return tuple(compact_figure(fig, decimals) for fig in figs)
+
+
+def payload_summary() -> dict:
+    return {
+        route: {**stats, "ratio": round(stats["sent_bytes"] / stats["raw_bytes"], 3) if stats["raw_bytes"] else None}
+        for route, stats in payload_stats.items()
+    }
+
+
+def init_payload(server: Flask):
+    # Response compression plus payload metrics. Flask runs after_request hooks in
+    # reverse registration order, so record_raw sees the body before Compress and
+    # record_sent sees it after.
+    server.config.setdefault("COMPRESS_ALGORITHM", ["br", "gzip"])
+    server.config.setdefault("COMPRESS_MIN_SIZE", 500)
+
+    @server.before_request
+    def start_timer():
+        g.payload_start = time.perf_counter()
+
+    @server.after_request
+    def record_sent(response):
+        raw = getattr(g, "payload_raw", None)
+        if raw is None:
+            return response
+
+        sent = response.calculate_content_length() or raw
+        elapsed_ms = 1000 * (time.perf_counter() - g.payload_start)
+        encoding = response.headers.get("Content-Encoding", "identity")
+        route = request.path
+        stats = payload_stats.setdefault(route, {"requests": 0, "raw_bytes": 0, "sent_bytes": 0, "ms": 0.0})
+        stats["requests"] += 1
+        stats["raw_bytes"] += raw
+        stats["sent_bytes"] += sent
+        stats["ms"] = round(stats["ms"] + elapsed_ms, 1)
+        print(f"[PAYLOAD] {route}: {raw / 1024:.1f} KB -> {sent / 1024:.1f} KB ({encoding}) in {elapsed_ms:.0f} ms")
+        return response
+
+    Compress(server)
+
+    @server.after_request
+    def record_raw(response):
+        if request.path.startswith(TRACKED_PREFIXES) and not response.direct_passthrough:
+            g.payload_raw = response.calculate_content_length() or 0
+        return response
+
+    @server.route("/_payload-stats")
+    def payload_stats_route():
+        return payload_summary()
@@ -0,0 +1,52 @@
+# polars_jobs.py
+# Runs one polars job handed over by background.run_polars_job:
+#   python -m polars_jobs <job>
+# Kept free of dash (only diskcache plus the job's own module are imported), so the
+# job interpreter starts in a fraction of the time a full app import takes
+
+import importlib
+import os
+import sys
+import traceback
+
+import diskcache
+
+CACHE_DIR = os.environ.get("PIU_CALLBACK_CACHE", ".callback_cache")
+RESULT_EXPIRE_SECONDS = 6 * 60 * 60
+
+result_cache = diskcache.Cache(CACHE_DIR)
+
+
+def progress_reporter(set_progress, label: str):
+    # Adapts a Dash set_progress handle to the (done, total) callbacks used by
+    # data_loader, throttled to whole-percent steps to keep cache writes low
+    last = {"percent": -1}
+
+    def report(done: int, total: int):
+        percent = int(100 * done / total) if total else 100
+        if percent != last["percent"]:
+            last["percent"] = percent
+            set_progress((percent, f"{label}: {done}/{total} participants"))
+
+    return report
+
+
+def run_job(job: str):
+    module_name, fn_name, args, label = result_cache.pop(f"{job}-request")
+    fn = getattr(importlib.import_module(module_name), fn_name)
+    kwargs = {}
+    if label is not None:
+        kwargs["progress"] = progress_reporter(lambda value: result_cache.set(f"{job}-progress", value), label)
+
+    try:
+        result = fn(*args, **kwargs)
+        # Hand back pandas so the forked job process never has to touch polars
+        if hasattr(result, "to_pandas"):
+            result = result.to_pandas()
+        result_cache.set(f"{job}-result", ("ok", result), expire=RESULT_EXPIRE_SECONDS)
+    except Exception:
+        result_cache.set(f"{job}-result", ("error", traceback.format_exc()), expire=RESULT_EXPIRE_SECONDS)
+
+
+if __name__ == "__main__":
+    run_job(sys.argv[1])
@@ -0,0 +1,53 @@
+# tests/test_circadian_features.py
+
+import numpy as np
+import polars as pl
+import pytest
+
+from circadian_features import EPOCH_SECONDS, compute_circadian_features
+
+SAMPLES_PER_DAY = 17280        # 5-second samples
+SAMPLES_PER_HOUR = 720
+EPOCH_HOURS = EPOCH_SECONDS / 3600
+
+
+def synthetic_series(days=5, onset=22.5, wake=7.0, start_hour=2.0, end_hour=3.0, nonwear=None, seed=0):
+    # A fixed sleeper: anglez barely moves between onset and wake and swings while awake.
+    # The recording starts and ends mid-night, so the first and last nights are partial
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(start_hour * SAMPLES_PER_HOUR), days * SAMPLES_PER_DAY + int(end_hour * SAMPLES_PER_HOUR))
+    seconds = (t % SAMPLES_PER_DAY) * 5
+    hour = seconds / 3600
+    asleep = (hour >= onset) | (hour < wake)
+    nonwear_flag = np.zeros(t.size, dtype=np.float32)
+    if nonwear is not None:
+        nonwear_flag[(t >= nonwear[0]) & (t < nonwear[1])] = 1
+    return pl.DataFrame({
+        "relative_date_PCIAT": (t // SAMPLES_PER_DAY).astype(np.int16),
+        "time_of_day": (seconds * 1_000_000_000).astype(np.int64),
+        "non-wear_flag": nonwear_flag,
+        "enmo": np.where(asleep, 0.001, 0.05).astype(np.float32),
+        "light": np.where(asleep, 0.0, 100.0).astype(np.float32),
+        "anglez": np.where(asleep, rng.normal(0, 0.05, t.size), rng.normal(0, 30, t.size)).astype(np.float32),
+    })
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    # Non-wear from 00:00 to 03:00 on day 3 cuts that night short
+    {"nonwear": (3 * SAMPLES_PER_DAY, 3 * SAMPLES_PER_DAY + 3 * SAMPLES_PER_HOUR)},
+    # Recording starts just after onset and ends just before wake
+    {"start_hour": 23.0, "end_hour": 6.0},
+])
+def test_sleep_window_matches_known_schedule(kwargs):
+    features = compute_circadian_features(synthetic_series(**kwargs).lazy(), "synthetic").row(0, named=True)
+    assert features["sleep_onset_hour"] == pytest.approx(22.5, abs=EPOCH_HOURS)
+    assert features["sleep_wake_hour"] == pytest.approx(7.0, abs=EPOCH_HOURS)
+    assert features["sleep_hours"] == pytest.approx(8.5, abs=2 * EPOCH_HOURS)
+
+
+def test_truncated_nights_only_give_no_sleep_window():
+    # Two hours of recording inside one night: no window has worn epochs on both sides
+    series = synthetic_series(days=0, start_hour=1.0, end_hour=3.0)
+    features = compute_circadian_features(series.lazy(), "synthetic").row(0, named=True)
+    assert features["sleep_onset_hour"] is None
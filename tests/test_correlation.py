@@ -0,0 +1,58 @@
+# tests/test_correlation.py
+
+import numpy as np
+import polars as pl
+import pytest
+
+import correlation
+from data_loader import prepare_train_data, query_frame
+
+
+@pytest.fixture
+def train(monkeypatch):
+    # 60 participants with a PCIAT total and 15 without; a feature that tracks PCIAT for
+    # the first group. The second group's values fall across the same range, so
+    # counting them as SII 3 would shift both the correlation and the ranks
+    rng = np.random.default_rng(0)
+    pciat = rng.uniform(0, 90, 75)
+    pciat[60:] = np.nan
+    feature = np.where(np.isnan(pciat), rng.uniform(0, 150, 75), pciat + rng.normal(0, 10, 75))
+    df = prepare_train_data(pl.DataFrame({
+        "id": [f"{i:08x}" for i in range(75)],
+        "Basic_Demos-Age": rng.integers(5, 22, 75),
+        "Basic_Demos-Sex": rng.integers(0, 2, 75),
+        "PCIAT-PCIAT_Total": pl.Series(pciat, nan_to_null=True),
+        "Physical-BMI": feature,
+    }))
+    monkeypatch.setattr(correlation, "scan_dataset",
+                        lambda name, columns=None, filters=None: query_frame(df.lazy(), columns, filters))
+    return df
+
+
+@pytest.mark.parametrize("method", ["pearson", "spearman"])
+def test_sii_correlation_skips_participants_without_pciat(train, method):
+    result = correlation._correlations.__wrapped__("test", 0, 100, "all", method)
+    labelled = train.filter(pl.col("PCIAT-PCIAT_Total").is_not_null()).to_pandas()
+
+    assert result["target_n"].loc["Physical-BMI", "sii"] == len(labelled)
+    assert result["target"].loc["Physical-BMI", "sii"] == pytest.approx(
+        labelled["Physical-BMI"].corr(labelled["sii"], method=method))
+
+
+@pytest.mark.parametrize("method", ["pearson", "spearman"])
+def test_pairwise_corr_matches_pandas(method):
+    # Random nulls plus two columns sharing a null pattern, a monotone transform, ties
+    # and a constant column
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=(200, 8))
+    values[:, 6] = np.round(values[:, 0] ** 3, 1)
+    values[:, 7] = 1.0
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[:, 5] = np.where(np.isnan(values[:, 4]), np.nan, rng.normal(size=200))
+    corr, counts = correlation.pairwise_corr(values, method=method)
+    expected = pl.DataFrame(values, nan_to_null=True).to_pandas().corr(method=method,
+                                                                       min_periods=correlation.MIN_PERIODS)
+    np.testing.assert_allclose(corr, expected.to_numpy(), atol=1e-12)
+    target_r, _ = correlation.pairwise_corr(values, values[:, [0, 4]], method=method)
+    np.testing.assert_allclose(target_r, expected.to_numpy()[:, [0, 4]], atol=1e-12)
+    assert counts[0, 1] == (~np.isnan(values[:, 0]) & ~np.isnan(values[:, 1])).sum()
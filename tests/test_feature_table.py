@@ -0,0 +1,65 @@
+# tests/test_feature_table.py
+
+import os
+
+import numpy as np
+import polars as pl
+import pytest
+
+import feature_table
+
+SAMPLES_PER_DAY = 17280        # 5-second samples
+
+
+def write_series(directory: str, id_val: str, days: int = 2, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(days * SAMPLES_PER_DAY)
+    n = t.size
+    os.makedirs(os.path.join(directory, f"id={id_val}"))
+    pl.DataFrame({
+        "step": t.astype(np.uint32),
+        "X": rng.normal(0, 0.5, n).astype(np.float32),
+        "Y": rng.normal(0, 0.5, n).astype(np.float32),
+        "Z": rng.normal(0, 0.5, n).astype(np.float32),
+        "enmo": rng.exponential(0.02, n).astype(np.float32),
+        "anglez": rng.normal(0, 30, n).astype(np.float32),
+        "non-wear_flag": np.zeros(n, dtype=np.float32),
+        "light": rng.uniform(0, 100, n).astype(np.float32),
+        "battery_voltage": np.full(n, 4000, dtype=np.float32),
+        "time_of_day": ((t % SAMPLES_PER_DAY) * 5 * 1_000_000_000).astype(np.int64),
+        "weekday": (t // SAMPLES_PER_DAY % 7 + 1).astype(np.int8),
+        "quarter": np.full(n, 1, dtype=np.int8),
+        "relative_date_PCIAT": (t // SAMPLES_PER_DAY).astype(np.int16),
+    }).write_parquet(os.path.join(directory, f"id={id_val}", "part-0.parquet"))
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    series_dir = data / "series_train.parquet"
+    series_dir.mkdir(parents=True)
+    for i in range(3):
+        write_series(str(series_dir), f"a{i:07x}", seed=i)
+    monkeypatch.setattr(feature_table, "DATA_DIR", str(data))
+    monkeypatch.setattr(feature_table, "FEATURE_TABLE_DIR", str(tmp_path / "feature_table"))
+    return data
+
+
+def write_train(data, rows):
+    pl.DataFrame(rows, schema=["id", "Basic_Demos-Enroll_Season", "Basic_Demos-Age", "Basic_Demos-Sex",
+                               "PCIAT-PCIAT_Total"], orient="row").write_csv(data / "train.csv")
+
+
+def test_rebuild_with_an_updated_participant_keeps_one_row_per_id(data_dir):
+    # The last row of a repeated id is the participant's current record
+    write_train(data_dir, [
+        ["a0000000", "Fall", 10, 0, 20], ["a0000001", "Winter", 12, 1, 40],
+        ["a0000002", "Spring", 15, 0, 60], ["a0000001", "Winter", 12, 1, 85],
+    ])
+    first = feature_table.build_feature_table("train")
+    second = feature_table.build_feature_table("train")
+
+    assert first.height == second.height == 3
+    assert second.get_column("id").to_list() == ["a0000000", "a0000002", "a0000001"]
+    assert second.filter(pl.col("id") == "a0000001").get_column("sii").to_list() == [3]
+    assert second.get_column("n_samples").to_list() == [2 * SAMPLES_PER_DAY] * 3
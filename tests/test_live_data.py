@@ -0,0 +1,96 @@
+# tests/test_live_data.py
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+import live_data
+
+
+def write(path, text: str, mode: str = "w"):
+    with open(path, mode) as f:
+        f.write(text)
+
+
+def test_appended_rows_are_read_as_a_delta(tmp_path):
+    path = tmp_path / "train.csv"
+    write(path, "id,a,b\nx,1,2\ny,3,4\n")
+    table = live_data._read_csv(str(path))
+    # y is updated by its appended row; z is new
+    write(path, "y,5,6\nz,7,8\n", "a")
+    table = live_data._read_csv(str(path), table)
+
+    assert table["offset"] == path.stat().st_size
+    assert_frame_equal(table["frame"], pl.DataFrame({"id": ["x", "y", "z"], "a": [1, 5, 7], "b": [2, 6, 8]}))
+    assert_frame_equal(table["frame"], live_data._read_csv(str(path))["frame"])
+
+
+@pytest.mark.parametrize("first", [None, "id,a,b\nx,1,2\n"])
+def test_partial_last_line_is_left_for_the_next_read(tmp_path, first):
+    # The watcher catches the file while the writer is in the middle of a row, either on
+    # the first read or on a later, appending one
+    path = tmp_path / "train.csv"
+    table = None
+    if first is not None:
+        write(path, first)
+        table = live_data._read_csv(str(path))
+    write(path, "id,a,b\nx,1,2\nabc,1")
+    table = live_data._read_csv(str(path), table)
+    assert table["frame"].get_column("id").to_list() == ["x"]
+
+    write(path, "0,7\nnext,3,4\n", "a")
+    table = live_data._read_csv(str(path), table)
+    assert_frame_equal(table["frame"], pl.DataFrame({"id": ["x", "abc", "next"], "a": [1, 10, 3], "b": [2, 7, 4]}))
+
+
+@pytest.mark.parametrize("rewritten", ["id,a,b\nx,9,9\ny,3,4\nz,5,6\n", "id,a,b\nq,1,1\n"])
+def test_rewritten_file_is_read_in_full(tmp_path, rewritten):
+    path = tmp_path / "train.csv"
+    write(path, "id,a,b\nx,1,2\ny,3,4\n")
+    table = live_data._read_csv(str(path))
+    write(path, rewritten)
+    table = live_data._read_csv(str(path), table)
+
+    assert_frame_equal(table["frame"], pl.read_csv(path))
+    assert table["offset"] == len(rewritten)
+
+
+@pytest.fixture
+def live(tmp_path, monkeypatch):
+    # A fresh registry with one dataset over a temporary csv and a scripted source version
+    for name, value in [("_builders", {}), ("_datasets", {}), ("_tables", {}),
+                        ("_series", {"stamps": None, "version": None})]:
+        monkeypatch.setattr(live_data, name, value)
+    monkeypatch.setattr(live_data, "SERIES_DIR", str(tmp_path / "series"))
+    published = []
+    monkeypatch.setattr(live_data, "publish_source_version", published.append)
+    return tmp_path / "train.csv", published
+
+
+def test_failed_refresh_is_retried(live, monkeypatch):
+    path, published = live
+    write(path, "id,a\nx,1\n")
+    builds = {"fail": False}
+
+    def build(tables):
+        if builds["fail"]:
+            builds["fail"] = False
+            raise RuntimeError("build failed")
+        return tables[str(path)]
+
+    live_data.register_dataset("t", [str(path)], build)
+    monkeypatch.setattr(live_data, "scan_source_version", lambda: "v1")
+    live_data.refresh()
+    assert live_data.get_dataset("t").height == 1
+
+    write(path, "y,2\n", "a")
+    monkeypatch.setattr(live_data, "scan_source_version", lambda: "v2")
+    builds["fail"] = True
+    with pytest.raises(RuntimeError):
+        live_data.refresh()
+    assert published == ["v1"]
+    assert live_data.get_dataset("t").height == 1
+
+    assert live_data.refresh() == ["t"]
+    assert published == ["v1", "v2"]
+    assert live_data.get_dataset("t").get_column("id").to_list() == ["x", "y"]
@@ -0,0 +1,77 @@
+# tests/test_param_search.py
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+for module in ("catboost", "lightgbm", "sklearn", "xgboost"):
+    pytest.importorskip(module)
+
+import param_search
+
+
+class InlinePool:
+    # Runs trials in the test process and reports the time budget as used up once
+    # `finished` trials have come back, counted across rungs
+    def __init__(self, finished: int):
+        self.remaining = finished
+
+    def imap_unordered(self, fn, tasks):
+        pool, tasks = self, iter(tasks)
+
+        class Results:
+            def next(self, timeout=None):
+                if pool.remaining == 0:
+                    raise multiprocessing.TimeoutError
+                pool.remaining -= 1
+                return fn(next(tasks))
+
+        return Results()
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
+def search(monkeypatch, tmp_path, finished: int, qwk):
+    monkeypatch.setattr(param_search, "SEARCH_RESULTS_DIR", str(tmp_path))
+    monkeypatch.setattr(param_search, "_make_pool", lambda jobs, X, y, folds: InlinePool(finished))
+    monkeypatch.setattr(param_search, "run_trial",
+                        lambda model, params, rounds, threads: {"qwk": qwk(params, rounds), "error": None})
+    X, y = np.zeros((40, 3)), np.arange(40) % 4
+    return param_search.successive_halving("lightgbm", X, y, n_trials=9, min_rounds=50, max_rounds=450,
+                                           eta=3, jobs=2, budget=60)
+
+
+def test_timeout_keeps_a_better_survivor_of_the_unfinished_rung(monkeypatch, tmp_path):
+    # All 9 trials of rung 0 finish, then the first survivor of rung 1, which improves
+    # with the extra rounds
+    best = search(monkeypatch, tmp_path, 10, lambda params, rounds: params["learning_rate"] + rounds / 1000)
+    records = param_search.load_trials("lightgbm")
+
+    assert best["rung"] == 1
+    assert best["qwk"] == records.get_column("qwk").max()
+
+
+def test_timeout_keeps_the_previous_best_when_the_rung_is_worse(monkeypatch, tmp_path):
+    best = search(monkeypatch, tmp_path, 10, lambda params, rounds: params["learning_rate"] - rounds / 1000)
+    records = param_search.load_trials("lightgbm")
+
+    assert best["rung"] == 0
+    assert best["qwk"] == records.get_column("qwk").max()
+
+
+def test_timeout_in_the_first_rung(monkeypatch, tmp_path):
+    best = search(monkeypatch, tmp_path, 4, lambda params, rounds: params["learning_rate"])
+
+    assert best["qwk"] == param_search.load_trials("lightgbm").get_column("qwk").max()
+    assert search(monkeypatch, tmp_path / "none", 0, lambda params, rounds: 0.0) is None
+
+
+def test_lightgbm_baseline_bags_like_the_notebook():
+    # The notebook's Params: bagging_fraction 0.784 every 4 iterations
+    params = param_search.make_model("lightgbm", param_search.BASELINE_PARAMS["lightgbm"], 50, 1).get_params()
+    assert (params["subsample"], params["subsample_freq"]) == (0.784, 4)